@@ -12,21 +12,24 @@ Example usage:
 """
 #!/usr/bin/env python3
 import os
-import time
-from datetime import datetime
 from typing import Dict, List, Optional, Any
 from web3 import Web3
 
-from shared.logging import setup_logger
-from shared.db import connect_db, ensure_schema
+from shared.logging import setup_logger, setup_logging
+from shared.db import connect_db, ensure_schema, insert_rows
 from shared.config import load_config
+from shared.rpc import (
+    RateLimiter, format_block_timestamp, get_block_timestamp, get_http_provider, iter_log_chunks, try_get_block_timestamps
+)
 
-setup_logger()
+setup_logging()
 logger = setup_logger(__name__)
 
 DB_PATH = 'shapeshift_chainflip_transactions.db'
 CHAINFLIP_CONTRACT = os.getenv('CHAINFLIP_CONTRACT', '0x0000000000000000000000000000000000000000')  # Replace with actual contract
 CHAINFLIP_RPC = os.getenv('CHAINFLIP_RPC', 'https://mainnet.infura.io/v3/your_key')  # Replace with actual RPC
+# Insert column order for chainflip_transactions (matches parse_chainflip_event keys)
+EVENT_COLUMNS = ('tx_hash', 'block_number', 'timestamp', 'from_address', 'to_address', 'amount', 'token', 'raw_data')
 
 # --- DB ---
 def init_database(db_path: str = DB_PATH) -> None:
@@ -50,20 +53,20 @@ def init_database(db_path: str = DB_PATH) -> None:
 # --- Web3 Helpers ---
 def get_web3_connection(rpc_url: str) -> Optional[Web3]:
     """Get a Web3 connection for a given RPC URL."""
-    w3 = Web3(Web3.HTTPProvider(rpc_url))
+    w3 = Web3(get_http_provider(rpc_url))
     if w3.is_connected():
         return w3
     logger.error(f"Failed to connect to {rpc_url}")
     return None
 
 # --- Event Parsing ---
-def parse_chainflip_event(log: dict, w3: Web3) -> Optional[dict]:
+def parse_chainflip_event(log: dict, w3: Web3, block_timestamps: Optional[Dict[int, int]] = None) -> Optional[dict]:
     """Parse a Chainflip broker event log. (Stub: implement actual parsing logic)"""
     try:
         tx_hash = log['transactionHash'].hex()
         block_number = log['blockNumber']
-        block = w3.eth.get_block(block_number)
-        timestamp = datetime.utcfromtimestamp(block['timestamp']).isoformat()
+        block_timestamp = get_block_timestamp(w3, block_number, block_timestamps)
+        timestamp = format_block_timestamp(block_timestamp)
         # Example fields (replace with actual event parsing):
         return {
             'tx_hash': tx_hash,
@@ -88,54 +91,27 @@ def scan_chain(rpc_url: str, contract_address: str) -> int:
     latest_block = w3.eth.block_number
     start_block = max(0, latest_block - 2000)
     batch_size = 1000
-    block_start = start_block
+    filter_params = {
+        'address': contract_address,
+        # 'topics': [...],
+    }
     total_found = 0
-    while block_start <= latest_block:
-        block_end = min(block_start + batch_size - 1, latest_block)
-        filter_params = {
-            'fromBlock': block_start,
-            'toBlock': block_end,
-            'address': contract_address,
-            # 'topics': [...],
-        }
-        logger.info(f"[chainflip] filter_params: {filter_params}")
-        try:
-            logs = w3.eth.get_logs(filter_params)
-        except Exception as e:
-            logger.error(f"chainflip: Error fetching logs {block_start}-{block_end}: {e}")
-            block_start += batch_size
-            continue
-        events = []
-        for log in logs:
-            event = parse_chainflip_event(log, w3)
-            if event:
-                events.append(event)
+    # One limiter paces both the log requests and the batched block lookups
+    rate_limiter = RateLimiter()
+    # Starts at batch_size blocks per request, shrinking/growing with the provider's eth_getLogs limits
+    for block_start, block_end, logs in iter_log_chunks(w3, filter_params, start_block, latest_block, batch_size, rate_limiter):
+        block_timestamps = try_get_block_timestamps(w3, (log['blockNumber'] for log in logs), rate_limiter) if logs else {}
+        events = [event for event in (parse_chainflip_event(log, w3, block_timestamps) for log in logs) if event]
         save_events_to_db(events)
         total_found += len(events)
         logger.info(f"chainflip: {len(events)} events in blocks {block_start}-{block_end}")
-        time.sleep(1)
-        block_start = block_end + 1
     return total_found
 
 # --- DB Save ---
 def save_events_to_db(events: List[dict], db_path: str = DB_PATH) -> None:
-    """Save a list of event dicts to the database."""
-    if not events:
-        return
-    with connect_db(db_path) as conn:
-        cursor = conn.cursor()
-        for event in events:
-            try:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO chainflip_transactions 
-                    (tx_hash, block_number, timestamp, from_address, to_address, amount, token, raw_data)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    event['tx_hash'], event['block_number'], event['timestamp'], event['from_address'],
-                    event['to_address'], event['amount'], event['token'], event['raw_data']
-                ))
-            except Exception as e:
-                logger.error(f"Failed to save event: {e}")
+    """Save parsed Chainflip events to chainflip_transactions."""
+    if events:
+        insert_rows(db_path, 'chainflip_transactions', EVENT_COLUMNS, (tuple(event[col] for col in EVENT_COLUMNS) for event in events))
 
 # --- Main ---
 def main() -> None:
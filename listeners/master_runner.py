@@ -9,13 +9,19 @@ import sys
 import sqlite3
 import time
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation, localcontext
+from typing import Callable, Dict, List, Optional
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from shared.db import connect_db
+from shared.token_cache import AMOUNT_CONTEXT, format_token_amount
+
 # Import all listeners
 try:
     import relay_listener
@@ -33,6 +39,69 @@ except ImportError as e:
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Insert column order for comprehensive_transactions (build_row_mapper returns values in this order)
+COMPREHENSIVE_COLUMNS = (
+    'protocol', 'chain', 'tx_hash', 'block_number', 'timestamp', 'from_asset', 'to_asset',
+    'from_amount', 'to_amount', 'from_amount_usd', 'to_amount_usd', 'volume_usd',
+    'affiliate_fee_amount', 'affiliate_fee_usd', 'affiliate_fee_asset', 'affiliate_address',
+    'sender_address', 'recipient_address', 'event_type', 'raw_data'
+)
+
+COMPREHENSIVE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS comprehensive_transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        protocol TEXT NOT NULL,
+        chain TEXT NOT NULL,
+        tx_hash TEXT NOT NULL,
+        block_number INTEGER,
+        timestamp INTEGER NOT NULL,
+        from_asset TEXT,
+        to_asset TEXT,
+        from_amount REAL,
+        to_amount REAL,
+        from_amount_usd REAL,
+        to_amount_usd REAL,
+        volume_usd REAL,
+        affiliate_fee_amount TEXT,
+        affiliate_fee_usd REAL,
+        affiliate_fee_asset TEXT,
+        affiliate_address TEXT,
+        sender_address TEXT,
+        recipient_address TEXT,
+        event_type TEXT,
+        raw_data TEXT,
+        created_at INTEGER DEFAULT (strftime('%s', 'now')),
+        UNIQUE(protocol, tx_hash, chain)
+    )
+'''
+
+# Source columns to read for each comprehensive column (first one present in the source table wins), and the default
+COLUMN_SOURCES = {
+    'chain': (('chain',), 'unknown'),
+    'tx_hash': (('tx_hash', 'transaction_hash'), ''),
+    'block_number': (('block_number',), 0),
+    'timestamp': (('timestamp', 'block_timestamp'), 0),
+    'from_asset': (('from_asset', 'input_token', 'sell_token'), ''),
+    'to_asset': (('to_asset', 'output_token', 'buy_token'), ''),
+    'from_amount': (('from_amount', 'input_amount'), 0),
+    'to_amount': (('to_amount', 'output_amount'), 0),
+    'from_amount_usd': (('from_amount_usd',), 0),
+    'to_amount_usd': (('to_amount_usd',), 0),
+    'volume_usd': (('volume_usd',), 0),
+    'affiliate_fee_amount': (('affiliate_fee_amount',), '0'),
+    'affiliate_fee_usd': (('affiliate_fee_usd',), 0),
+    'affiliate_fee_asset': (('affiliate_fee_asset',), ''),
+    'affiliate_address': (('affiliate_address', 'partner'), ''),
+    'sender_address': (('sender', 'from_address'), ''),
+    'recipient_address': (('recipient', 'to_address'), ''),
+    'event_type': (('event_type',), 'transaction'),
+}
+
+# Comprehensive columns stored as REAL (affiliate_fee_amount is exact TEXT; 18-decimal base units overflow REAL precision)
+FLOAT_COLUMNS = frozenset({
+    'from_amount', 'to_amount', 'from_amount_usd', 'to_amount_usd', 'volume_usd', 'affiliate_fee_usd'
+})
+
 class MasterRunner:
     def __init__(self):
         self.comprehensive_db_path = "databases/comprehensive_affiliate.db"
@@ -50,119 +119,102 @@ class MasterRunner:
     def init_comprehensive_database(self):
         """Initialize the comprehensive database that combines all protocols"""
         os.makedirs(os.path.dirname(self.comprehensive_db_path), exist_ok=True)
-        conn = sqlite3.connect(self.comprehensive_db_path)
+        conn = connect_db(self.comprehensive_db_path)
         cursor = conn.cursor()
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS comprehensive_transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                protocol TEXT NOT NULL,
-                chain TEXT NOT NULL,
-                tx_hash TEXT NOT NULL,
-                block_number INTEGER,
-                timestamp INTEGER NOT NULL,
-                from_asset TEXT,
-                to_asset TEXT,
-                from_amount REAL,
-                to_amount REAL,
-                from_amount_usd REAL,
-                to_amount_usd REAL,
-                volume_usd REAL,
-                affiliate_fee_amount REAL,
-                affiliate_fee_usd REAL,
-                affiliate_fee_asset TEXT,
-                affiliate_address TEXT,
-                sender_address TEXT,
-                recipient_address TEXT,
-                event_type TEXT,
-                raw_data TEXT,
-                created_at INTEGER DEFAULT (strftime('%s', 'now')),
-                UNIQUE(protocol, tx_hash, chain)
-            )
-        ''')
+        cursor.execute(COMPREHENSIVE_SCHEMA)
+        self.migrate_fee_amounts_to_text(cursor)
         
         # Create indexes for performance
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_protocol ON comprehensive_transactions(protocol)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_chain ON comprehensive_transactions(chain)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON comprehensive_transactions(timestamp)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_tx_hash ON comprehensive_transactions(tx_hash)')
+        # Fee totals are grouped in Python (exact TEXT amounts), so this older index only slowed inserts
+        cursor.execute('DROP INDEX IF EXISTS idx_protocol_fee_asset')
+        
+        # Older consolidations copied Relay/Chainflip ISO timestamps verbatim; TEXT sorts above every INTEGER in SQLite
+        cursor.execute('''
+            UPDATE comprehensive_transactions
+            SET timestamp = COALESCE(CAST(strftime('%s', timestamp) AS INTEGER), 0)
+            WHERE typeof(timestamp) = 'text'
+        ''')
         
         conn.commit()
         conn.close()
         logger.info(f"✅ Comprehensive database initialized: {self.comprehensive_db_path}")
 
+    def migrate_fee_amounts_to_text(self, cursor: sqlite3.Cursor):
+        """Rebuild a comprehensive table whose affiliate_fee_amount column is REAL (its affinity rounds raw amounts)"""
+        column_types = {row[1]: row[2] for row in cursor.execute('PRAGMA table_info(comprehensive_transactions)')}
+        if column_types.get('affiliate_fee_amount') != 'REAL':
+            return
+        logger.info("🔧 Migrating comprehensive_transactions.affiliate_fee_amount to TEXT")
+        cursor.execute('ALTER TABLE comprehensive_transactions RENAME TO comprehensive_transactions_real_fees')
+        cursor.execute(COMPREHENSIVE_SCHEMA)
+        columns = ('id',) + COMPREHENSIVE_COLUMNS + ('created_at',)
+        # Whole REAL values are written without exponent ('1e+21' -> '1000000000000000000000')
+        select = [
+            "CASE WHEN affiliate_fee_amount = ROUND(affiliate_fee_amount) THEN printf('%.0f', affiliate_fee_amount) "
+            "ELSE CAST(affiliate_fee_amount AS TEXT) END" if col == 'affiliate_fee_amount' else col
+            for col in columns
+        ]
+        cursor.execute(f'''
+            INSERT INTO comprehensive_transactions ({', '.join(columns)})
+            SELECT {', '.join(select)} FROM comprehensive_transactions_real_fees
+        ''')
+        cursor.execute('DROP TABLE comprehensive_transactions_real_fees')
+
     def run_all_listeners(self, blocks_to_scan: int = 2000, limit: int = 100):
-        """Run all protocol listeners"""
+        """Run all protocol listeners concurrently (they are independent and RPC/API-bound)"""
         logger.info("🚀 Starting Master Runner - All Protocol Listeners")
         
-        results = {}
         start_time = time.time()
         
-        # Run relay listener first (module-based)
-        logger.info(f"\n{'='*60}")
-        logger.info(f"🔍 Running RELAY listener...")
-        logger.info(f"{'='*60}")
-        
-        try:
-            protocol_start = time.time()
+        def run_relay():
             relay_listener.init_database()
             transactions = relay_listener.find_last_20_shapeshift_transactions()
             relay_listener.save_transactions_to_db(transactions)
+        
+        # Relay is module-based; the rest are class-based listeners
+        jobs = {'relay': run_relay}
+        for protocol, listener in self.listeners.items():
+            # API-based listeners use limit, blockchain listeners use blocks_to_scan
+            arg = limit if protocol in ['thorchain', 'chainflip'] else blocks_to_scan
+            jobs[protocol] = partial(listener.run_listener, arg)
+        
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            futures = {protocol: executor.submit(self.run_protocol, protocol, job) for protocol, job in jobs.items()}
+        results = {protocol: future.result() for protocol, future in futures.items()}
+                
+        total_time = time.time() - start_time
+        
+        # Print summary
+        self.print_execution_summary(results, total_time)
+        
+        return results
+
+    def run_protocol(self, protocol: str, job: Callable[[], None]) -> Dict:
+        """Run one protocol listener and record its status and duration"""
+        logger.info(f"🔍 Running {protocol.upper()} listener...")
+        protocol_start = time.time()
+        try:
+            job()
             protocol_time = time.time() - protocol_start
-            results['relay'] = {
+            logger.info(f"✅ {protocol.upper()} completed in {protocol_time:.2f}s")
+            return {
                 'status': 'success',
                 'time': protocol_time,
                 'error': None
             }
-            logger.info(f"✅ RELAY completed in {protocol_time:.2f}s")
         except Exception as e:
             protocol_time = time.time() - protocol_start
-            results['relay'] = {
+            logger.error(f"❌ {protocol.upper()} failed: {e}")
+            return {
                 'status': 'error',
                 'time': protocol_time,
                 'error': str(e)
             }
-            logger.error(f"❌ RELAY failed: {e}")
-        
-        # Run class-based listeners
-        for protocol, listener in self.listeners.items():
-            logger.info(f"\n{'='*60}")
-            logger.info(f"🔍 Running {protocol.upper()} listener...")
-            logger.info(f"{'='*60}")
-            
-            try:
-                protocol_start = time.time()
-                
-                if protocol in ['thorchain', 'chainflip']:
-                    # API-based listeners use limit
-                    listener.run_listener(limit)
-                else:
-                    # Blockchain listeners use blocks_to_scan
-                    listener.run_listener(blocks_to_scan)
-                
-                protocol_time = time.time() - protocol_start
-                results[protocol] = {
-                    'status': 'success',
-                    'time': protocol_time,
-                    'error': None
-                }
-                logger.info(f"✅ {protocol.upper()} completed in {protocol_time:.2f}s")
-                
-            except Exception as e:
-                protocol_time = time.time() - protocol_start
-                results[protocol] = {
-                    'status': 'error',
-                    'time': protocol_time,
-                    'error': str(e)
-                }
-                logger.error(f"❌ {protocol.upper()} failed: {e}")
-                
-        total_time = time.time() - start_time
-        
-        # Print summary
-        self.print_execution_summary(results, total_time)
-        
-        return results
 
     def consolidate_databases(self):
         """Consolidate all protocol databases into comprehensive database"""
@@ -202,7 +254,7 @@ class MasterRunner:
             }
         }
         
-        comp_conn = sqlite3.connect(self.comprehensive_db_path)
+        comp_conn = connect_db(self.comprehensive_db_path)
         comp_cursor = comp_conn.cursor()
         
         total_consolidated = 0
@@ -213,8 +265,9 @@ class MasterRunner:
                 continue
                 
             try:
-                # Connect to source database
+                # Source databases are only read, so open them plainly (connect_db would switch them to WAL)
                 source_conn = sqlite3.connect(config['source_db'])
+                source_conn.row_factory = sqlite3.Row
                 source_cursor = source_conn.cursor()
                 
                 # Check if table exists
@@ -224,41 +277,23 @@ class MasterRunner:
                     source_conn.close()
                     continue
                 
-                # Get all transactions from source
+                # Stream transactions from source (sqlite3.Row carries the column names)
                 source_cursor.execute(f"SELECT * FROM {config['source_table']}")
-                rows = source_cursor.fetchall()
-                
-                # Get column names
-                source_cursor.execute(f"PRAGMA table_info({config['source_table']})")
-                columns = [row[1] for row in source_cursor.fetchall()]
                 
-                # Map to comprehensive schema
-                for row in rows:
-                    row_dict = dict(zip(columns, row))
-                    consolidated_row = self.map_to_comprehensive_schema(row_dict, config['protocol'])
-                    
-                    if consolidated_row:
-                        comp_cursor.execute('''
-                            INSERT OR IGNORE INTO comprehensive_transactions 
-                            (protocol, chain, tx_hash, block_number, timestamp, from_asset, to_asset,
-                             from_amount, to_amount, from_amount_usd, to_amount_usd, volume_usd,
-                             affiliate_fee_amount, affiliate_fee_usd, affiliate_fee_asset, affiliate_address,
-                             sender_address, recipient_address, event_type, raw_data)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            consolidated_row['protocol'], consolidated_row['chain'], consolidated_row['tx_hash'],
-                            consolidated_row['block_number'], consolidated_row['timestamp'], consolidated_row['from_asset'],
-                            consolidated_row['to_asset'], consolidated_row['from_amount'], consolidated_row['to_amount'],
-                            consolidated_row['from_amount_usd'], consolidated_row['to_amount_usd'], consolidated_row['volume_usd'],
-                            consolidated_row['affiliate_fee_amount'], consolidated_row['affiliate_fee_usd'],
-                            consolidated_row['affiliate_fee_asset'], consolidated_row['affiliate_address'],
-                            consolidated_row['sender_address'], consolidated_row['recipient_address'],
-                            consolidated_row['event_type'], consolidated_row['raw_data']
-                        ))
-                        total_consolidated += 1
+                # Map to comprehensive schema and insert as a single batch
+                columns = [description[0] for description in source_cursor.description]
+                map_row = self.build_row_mapper(columns, config['protocol'])
+                params = map(map_row, source_cursor)
+                comp_cursor.executemany(f'''
+                    INSERT OR IGNORE INTO comprehensive_transactions
+                    ({', '.join(COMPREHENSIVE_COLUMNS)})
+                    VALUES ({', '.join('?' * len(COMPREHENSIVE_COLUMNS))})
+                ''', params)
+                inserted = max(comp_cursor.rowcount, 0)
+                total_consolidated += inserted
                 
                 source_conn.close()
-                logger.info(f"✅ Consolidated {len(rows)} {config['protocol']} transactions")
+                logger.info(f"✅ Consolidated {inserted} {config['protocol']} transactions")
                 
             except Exception as e:
                 logger.error(f"❌ Error consolidating {config['protocol']}: {e}")
@@ -268,51 +303,71 @@ class MasterRunner:
         
         logger.info(f"💾 Total consolidated transactions: {total_consolidated}")
 
-    def map_to_comprehensive_schema(self, row_dict: Dict, protocol: str) -> Optional[Dict]:
-        """Map protocol-specific row to comprehensive schema"""
-        try:
-            # Base mapping - adapt based on actual column names in each protocol
-            mapped = {
-                'protocol': protocol,
-                'chain': row_dict.get('chain', 'unknown'),
-                'tx_hash': row_dict.get('tx_hash', row_dict.get('transaction_hash', '')),
-                'block_number': row_dict.get('block_number', 0),
-                'timestamp': row_dict.get('timestamp', row_dict.get('block_timestamp', 0)),
-                'from_asset': row_dict.get('from_asset', row_dict.get('input_token', row_dict.get('sell_token', ''))),
-                'to_asset': row_dict.get('to_asset', row_dict.get('output_token', row_dict.get('buy_token', ''))),
-                'from_amount': self.safe_float(row_dict.get('from_amount', row_dict.get('input_amount', 0))),
-                'to_amount': self.safe_float(row_dict.get('to_amount', row_dict.get('output_amount', 0))),
-                'from_amount_usd': self.safe_float(row_dict.get('from_amount_usd', 0)),
-                'to_amount_usd': self.safe_float(row_dict.get('to_amount_usd', 0)),
-                'volume_usd': self.safe_float(row_dict.get('volume_usd', 0)),
-                'affiliate_fee_amount': self.safe_float(row_dict.get('affiliate_fee_amount', 0)),
-                'affiliate_fee_usd': self.safe_float(row_dict.get('affiliate_fee_usd', 0)),
-                'affiliate_fee_asset': row_dict.get('affiliate_fee_asset', ''),
-                'affiliate_address': row_dict.get('affiliate_address', row_dict.get('partner', '')),
-                'sender_address': row_dict.get('sender', row_dict.get('from_address', '')),
-                'recipient_address': row_dict.get('recipient', row_dict.get('to_address', '')),
-                'event_type': row_dict.get('event_type', 'transaction'),
-                'raw_data': str(row_dict)
-            }
-            
-            return mapped
-            
-        except Exception as e:
-            logger.error(f"Error mapping row for {protocol}: {e}")
-            return None
+    def build_row_mapper(self, columns: List[str], protocol: str) -> Callable[[sqlite3.Row], tuple]:
+        """Build a row -> insert tuple mapper for one source table (column fallbacks resolved once, not per row)"""
+        getters = []
+        for col in COMPREHENSIVE_COLUMNS:
+            if col == 'protocol':
+                getters.append(lambda row: protocol)
+            elif col == 'raw_data':
+                getters.append(lambda row: str(dict(row)))
+            else:
+                candidates, default = COLUMN_SOURCES[col]
+                source = next((c for c in candidates if c in columns), None)
+                if source is None:
+                    value = self.safe_float(default) if col in FLOAT_COLUMNS else default
+                    getters.append(lambda row, value=value: value)
+                elif col in FLOAT_COLUMNS:
+                    getters.append(lambda row, source=source: self.safe_float(row[source]))
+                elif col == 'affiliate_fee_amount':
+                    getters.append(lambda row, source=source: self.safe_amount(row[source]))
+                elif col == 'timestamp':
+                    getters.append(lambda row, source=source: self.safe_timestamp(row[source]))
+                else:
+                    getters.append(lambda row, source=source: row[source])
+        return lambda row: tuple(getter(row) for getter in getters)
 
     def safe_float(self, value) -> float:
-        """Safely convert value to float"""
+        """Safely convert value to float (called per float cell during consolidation)"""
         try:
-            if isinstance(value, str):
-                # Handle string representations of large numbers
-                if value.isdigit():
-                    return float(value)
-                return float(value) if value else 0.0
             return float(value) if value else 0.0
-        except:
+        except (TypeError, ValueError, OverflowError):
             return 0.0
 
+    def safe_amount(self, value) -> str:
+        """Normalize a token amount to an exact decimal string (whole base-unit amounts stay integers), '0' if invalid"""
+        try:
+            amount = Decimal(str(value)) if value not in (None, '') else Decimal(0)
+        except InvalidOperation:
+            return '0'
+        if not amount.is_finite():
+            return '0'
+        return str(int(amount)) if amount == amount.to_integral_value() else format(amount.normalize(AMOUNT_CONTEXT), 'f')
+
+    def format_fee_amount(self, amount: Decimal, asset: Optional[str]) -> str:
+        """Scale a raw fee total by the asset's token decimals when the asset is a known token (raw units otherwise)"""
+        if asset and amount == amount.to_integral_value():
+            try:
+                return format_token_amount(int(amount), asset)
+            except (ValueError, RuntimeError):
+                # Not a token address (e.g. a THORChain asset) or no token metadata available
+                pass
+        return f"{amount:,}"
+
+    def safe_timestamp(self, value) -> int:
+        """Convert an epoch value or ISO-8601 string (naive means UTC) to epoch seconds, 0 if unparseable"""
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            pass
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return 0
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp())
+
     def print_execution_summary(self, results: Dict, total_time: float):
         """Print execution summary"""
         logger.info(f"\n{'='*80}")
@@ -333,36 +388,42 @@ class MasterRunner:
             if result['error']:
                 logger.info(f"      Error: {result['error']}")
 
-    def get_comprehensive_stats(self):
-        """Get comprehensive database statistics"""
-        conn = sqlite3.connect(self.comprehensive_db_path)
+    def get_comprehensive_stats(self, since_ts: Optional[int] = None) -> Dict:
+        """Log and return comprehensive database statistics, optionally only for transactions at or after since_ts"""
+        conn = connect_db(self.comprehensive_db_path)
         cursor = conn.cursor()
         
+        # Push the date filter into every query so SQLite can use idx_timestamp
+        time_filter = "timestamp >= ?" if since_ts is not None else "1"
+        params = (since_ts,) if since_ts is not None else ()
+        
         logger.info(f"\n{'='*80}")
         logger.info("📊 COMPREHENSIVE DATABASE STATISTICS")
         logger.info(f"{'='*80}")
+        if since_ts is not None:
+            logger.info(f"📅 Since: {datetime.utcfromtimestamp(since_ts).strftime('%Y-%m-%d %H:%M:%S')} UTC")
         
         # Total transactions
-        cursor.execute("SELECT COUNT(*) FROM comprehensive_transactions")
+        cursor.execute(f"SELECT COUNT(*) FROM comprehensive_transactions WHERE {time_filter}", params)
         total_tx = cursor.fetchone()[0]
         logger.info(f"📈 Total Transactions: {total_tx:,}")
         
         # By protocol
-        cursor.execute("SELECT protocol, COUNT(*) FROM comprehensive_transactions GROUP BY protocol ORDER BY COUNT(*) DESC")
+        cursor.execute(f"SELECT protocol, COUNT(*) FROM comprehensive_transactions WHERE {time_filter} GROUP BY protocol ORDER BY COUNT(*) DESC", params)
         protocol_stats = cursor.fetchall()
         logger.info(f"\n📊 Transactions by Protocol:")
         for protocol, count in protocol_stats:
             logger.info(f"   {protocol}: {count:,}")
         
         # By chain
-        cursor.execute("SELECT chain, COUNT(*) FROM comprehensive_transactions GROUP BY chain ORDER BY COUNT(*) DESC")
+        cursor.execute(f"SELECT chain, COUNT(*) FROM comprehensive_transactions WHERE {time_filter} GROUP BY chain ORDER BY COUNT(*) DESC", params)
         chain_stats = cursor.fetchall()
         logger.info(f"\n🔗 Transactions by Chain:")
         for chain, count in chain_stats:
             logger.info(f"   {chain}: {count:,}")
         
         # Financial stats
-        cursor.execute("SELECT SUM(affiliate_fee_usd), SUM(volume_usd) FROM comprehensive_transactions")
+        cursor.execute(f"SELECT SUM(affiliate_fee_usd), SUM(volume_usd) FROM comprehensive_transactions WHERE {time_filter}", params)
         total_fees, total_volume = cursor.fetchone()
         total_fees = total_fees or 0
         total_volume = total_volume or 0
@@ -371,7 +432,42 @@ class MasterRunner:
         logger.info(f"   Total Affiliate Fees: ${total_fees:,.2f}")
         logger.info(f"   Total Volume: ${total_volume:,.2f}")
         
+        # Affiliate fees by asset, summed exactly (SQLite SUM would coerce the TEXT amounts to REAL)
+        cursor.execute(f'''
+            SELECT protocol, affiliate_fee_asset, affiliate_fee_amount, affiliate_fee_usd
+            FROM comprehensive_transactions
+            WHERE affiliate_fee_amount NOT IN ('', '0') AND {time_filter}
+        ''', params)
+        fee_totals = {}
+        with localcontext(AMOUNT_CONTEXT):
+            for protocol, asset, fee_amount, fee_usd in cursor:
+                totals = fee_totals.setdefault((protocol, asset), [Decimal(0), 0.0])
+                totals[0] += Decimal(self.safe_amount(fee_amount))
+                totals[1] += fee_usd or 0
+        fee_stats = sorted(
+            ((protocol, asset, amount, usd) for (protocol, asset), (amount, usd) in fee_totals.items()),
+            key=lambda stat: (stat[0], -stat[3])
+        )
+        logger.info(f"\n🪙 Affiliate Fees by Asset:")
+        for protocol, asset, fee_amount, fee_usd in fee_stats:
+            logger.info(f"   {protocol} {asset or 'Unknown'}: {self.format_fee_amount(fee_amount, asset)} (${fee_usd:,.2f})")
+        
         conn.close()
+        return {
+            'total_transactions': total_tx,
+            'by_protocol': dict(protocol_stats),
+            'by_chain': dict(chain_stats),
+            'total_fees_usd': total_fees,
+            'total_volume_usd': total_volume,
+            'fees_by_asset': fee_stats,
+        }
+
+def parse_since(value: str) -> int:
+    """argparse type for --since: a YYYY-MM-DD date (UTC) as epoch seconds"""
+    try:
+        return int(datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp())
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}' (expected YYYY-MM-DD)")
 
 def main():
     """Main function"""
@@ -381,13 +477,15 @@ def main():
     parser.add_argument('--skip-consolidation', action='store_true', help='Skip database consolidation')
     parser.add_argument('--consolidate-only', action='store_true', help='Only run database consolidation')
     parser.add_argument('--stats-only', action='store_true', help='Only show comprehensive statistics')
+    parser.add_argument('--since', type=parse_since, help='Only include transactions on or after this date (YYYY-MM-DD, UTC) in statistics')
     
     args = parser.parse_args()
+    since_ts = args.since
     
     runner = MasterRunner()
     
     if args.stats_only:
-        runner.get_comprehensive_stats()
+        runner.get_comprehensive_stats(since_ts)
         return
     
     if not args.consolidate_only:
@@ -399,7 +497,7 @@ def main():
         runner.consolidate_databases()
     
     # Show final statistics
-    runner.get_comprehensive_stats()
+    runner.get_comprehensive_stats(since_ts)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
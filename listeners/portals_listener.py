@@ -14,23 +14,41 @@ Example usage:
 import os
 import time
 import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Dict, List, Optional, Any
 from web3 import Web3
-from eth_utils import to_bytes, to_hex, to_checksum_address, to_canonical_address
+from eth_utils import keccak, to_bytes, to_hex, to_checksum_address, to_canonical_address
 import requests
 
-from shared.logging import setup_logger, get_logger
-from shared.db import connect_db, ensure_schema
+from shared.logging import setup_logger, setup_logging, get_logger
+from shared.block_tracker import find_block_by_timestamp
+from shared.db import connect_db, ensure_schema, insert_rows
 from shared.config import load_config
+from shared.rpc import (
+    DEFAULT_REQUESTS_PER_SECOND, RATE_LIMIT_RETRIES, RateLimiter, get_block_timestamp, get_block_timestamps,
+    get_http_provider, get_transactions, is_log_limit_error, is_rate_limit_error, next_log_range, rate_limit_backoff
+)
 
-setup_logger()
+setup_logging()
 logger = get_logger(__name__)
 
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'portals_listener_config.yaml')
 PROGRESS_PATH = os.path.join(os.path.dirname(__file__), 'portals_progress.json')
 DB_PATH = 'databases/portals_transactions.db'
 
+# Insert column order for portals_transactions (union of the Transfer and Portal event keys)
+EVENT_COLUMNS = (
+    'chain', 'tx_hash', 'block_number', 'block_timestamp', 'event_type', 'token', 'amount', 'sender', 'recipient',
+    'input_token', 'input_amount', 'output_token', 'output_amount', 'broadcaster', 'partner', 'is_portals_router'
+)
+
+# Guards the shared progress dict/file while chains are scanned concurrently
+_PROGRESS_LOCK = threading.RLock()
+
 ERC20_TRANSFER_TOPIC = '0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'
 
 PORTALS_ABI = [
@@ -57,11 +75,34 @@ def get_portals_event_topic() -> str:
     Returns:
         str: The event topic hash for the Portals event.
     """
-    from eth_utils import keccak
     event_signature = "Portal(address,uint256,address,uint256,address,address,address,address)"
     return '0x' + keccak(text=event_signature).hex()
 
 PORTALS_EVENT_TOPIC = get_portals_event_topic()
+# Raw 32-byte topic0 values, so log dispatch compares bytes instead of re-hexing every topic
+ERC20_TRANSFER_TOPIC_BYTES = bytes.fromhex(ERC20_TRANSFER_TOPIC[2:])
+PORTALS_EVENT_TOPIC_BYTES = bytes.fromhex(PORTALS_EVENT_TOPIC[2:])
+
+@lru_cache(maxsize=None)
+def address_bytes(address: str) -> bytes:
+    """
+    Return the 20-byte canonical form of an address (memoized; config addresses repeat on every log).
+    Args:
+        address (str): Hex address, any casing.
+    Returns:
+        bytes: 20-byte address.
+    """
+    return to_canonical_address(address)
+
+def router_address_set(portals_contracts: List[str]) -> frozenset:
+    """
+    Build the set of Portals router addresses as 20-byte values (once per scan, not per log).
+    Args:
+        portals_contracts (List[str]): Portals router addresses.
+    Returns:
+        frozenset: Router addresses as bytes.
+    """
+    return frozenset(address_bytes(router) for router in portals_contracts)
 
 def load_progress() -> dict:
     """Load progress from file or return empty dict."""
@@ -72,12 +113,16 @@ def load_progress() -> dict:
 
 def save_progress(progress: dict) -> None:
     """
-    Save progress to a JSON file.
+    Save progress to a JSON file atomically (temp file + os.replace), so a crash mid-write
+    never leaves a truncated progress file behind.
     Args:
         progress (dict): Progress data to save.
     """
-    with open(PROGRESS_PATH, 'w') as f:
-        json.dump(progress, f, indent=2)
+    tmp_path = PROGRESS_PATH + '.tmp'
+    with _PROGRESS_LOCK:
+        with open(tmp_path, 'w') as f:
+            json.dump(progress, f, separators=(',', ':'))
+        os.replace(tmp_path, PROGRESS_PATH)
 
 def init_database() -> None:
     """Initialize the database schema using shared.db.ensure_schema."""
@@ -116,19 +161,20 @@ def get_web3_providers(chain_name: str, chain_cfg: dict, alchemy_urls: dict) ->
         (Web3, Optional[Web3]): Primary and fallback Web3 providers.
     """
     if chain_name == 'ethereum' and alchemy_urls.get('ethereum'):
-        w3 = Web3(Web3.HTTPProvider(alchemy_urls['ethereum']))
+        w3 = Web3(get_http_provider(alchemy_urls['ethereum']))
         logger.info(f"[ethereum] FORCED to use Alchemy provider: {alchemy_urls['ethereum']}")
         fallback_w3 = None
     else:
-        w3 = Web3(Web3.HTTPProvider(chain_cfg['rpc_url']))
-        fallback_w3 = Web3(Web3.HTTPProvider(alchemy_urls[chain_name])) if alchemy_urls.get(chain_name) else None
+        w3 = Web3(get_http_provider(chain_cfg['rpc_url']))
+        fallback_w3 = Web3(get_http_provider(alchemy_urls[chain_name])) if alchemy_urls.get(chain_name) else None
     return w3, fallback_w3
 
-def get_block_range(w3: Web3, chain_cfg: dict, progress: dict, today_mode: bool) -> (int, int):
+def get_block_range(w3: Web3, chain_name: str, chain_cfg: dict, progress: dict, today_mode: bool) -> (int, int):
     """
     Determine start and end block for scanning.
     Args:
         w3 (Web3): Web3 provider.
+        chain_name (str): Name of the chain (the progress key scan_chain saves under).
         chain_cfg (dict): Chain configuration.
         progress (dict): Progress data.
         today_mode (bool): Whether to scan only today's blocks.
@@ -144,68 +190,103 @@ def get_block_range(w3: Web3, chain_cfg: dict, progress: dict, today_mode: bool)
         start_block = find_block_by_timestamp(w3, target_timestamp, config_start_block, latest_block)
         logger.info(f"Scanning only today's blocks: {start_block} to {latest_block}")
     else:
-        start_block = progress.get(chain_cfg['name'], chain_cfg['start_block'])
+        start_block = progress.get(chain_name, chain_cfg['start_block'])
         logger.info(f"Scanning blocks {start_block} to {latest_block}")
     return start_block, latest_block
 
-def find_block_by_timestamp(w3: Web3, target_timestamp: int, start_block: int, end_block: int) -> int:
+def fetch_logs_with_retry(
+    w3: Web3,
+    filter_params: dict,
+    chain_name: str,
+    block_start: int,
+    block_end: int,
+    max_retries: int = RATE_LIMIT_RETRIES,
+    fallback_w3: Optional[Web3] = None,
+    rate_limiter: Optional[RateLimiter] = None
+) -> (List[Any], Web3):
     """
-    Binary search for the first block with timestamp >= target_timestamp.
-    Args:
-        w3 (Web3): Web3 provider.
-        target_timestamp (int): Target UTC timestamp.
-        start_block (int): Start block number.
-        end_block (int): End block number.
-    Returns:
-        int: Block number with timestamp >= target_timestamp.
-    """
-    low = start_block
-    high = end_block
-    result = end_block
-    while low <= high:
-        mid = (low + high) // 2
-        block = w3.eth.get_block(mid)
-        if block['timestamp'] < target_timestamp:
-            low = mid + 1
-        else:
-            result = mid
-            high = mid - 1
-    return result
-
-def fetch_logs_with_retry(w3: Web3, filter_params: dict, chain_name: str, block_start: int, block_end: int, max_retries: int = 5, fallback_w3: Optional[Web3] = None) -> (List[Any], Web3):
-    """
-    Fetch logs with retry and fallback logic.
+    Fetch logs, backing off on 429s and failing over from Infura to Alchemy.
+    The transport does not retry 429s, so the first one reaches this function; the rate limiter
+    is the only backoff (it halves its rate and holds requests back for rate_limit_backoff(attempt)).
     Args:
         w3 (Web3): Web3 provider.
         filter_params (dict): Log filter parameters.
         chain_name (str): Name of the chain.
         block_start (int): Start block.
         block_end (int): End block.
-        max_retries (int): Max retry attempts.
+        max_retries (int): Max attempts while rate limited.
         fallback_w3 (Optional[Web3]): Fallback provider.
+        rate_limiter (Optional[RateLimiter]): Per-chain request pacing, adjusted on 429s.
     Returns:
         (List[Any], Web3): Logs and the Web3 provider used.
+    Raises:
+        Exception: The last 429 error once max_retries attempts were rate limited, or any other get_logs error.
     """
     logger.info(f"[{chain_name}] Using provider: {getattr(w3.provider, 'endpoint_uri', 'unknown')}")
+    rate_limiter = rate_limiter or RateLimiter()
     for attempt in range(max_retries):
         try:
-            return w3.eth.get_logs(filter_params), w3
+            rate_limiter.acquire()
+            logs = w3.eth.get_logs(filter_params)
+            rate_limiter.on_success()
+            return logs, w3
         except Exception as e:
-            is_429 = '429' in str(e)
-            if is_429 and fallback_w3 is not None and 'infura' in getattr(w3.provider, 'endpoint_uri', ''):
+            if not is_rate_limit_error(e):
+                raise
+            if fallback_w3 is not None and 'infura' in getattr(w3.provider, 'endpoint_uri', ''):
+                rate_limiter.on_rate_limited()
                 logger.warning(f"{chain_name}: Rate limited by Infura. Switching to Alchemy...")
                 logger.info(f"[{chain_name}] Switching to provider: {getattr(fallback_w3.provider, 'endpoint_uri', 'unknown')}")
                 return 'SWITCH_TO_ALCHEMY', fallback_w3
-            if is_429:
-                wait = 2 ** attempt
-                logger.warning(f"{chain_name}: Rate limited fetching logs {block_start}-{block_end}. Retrying in {wait} seconds...")
-                time.sleep(wait)
-            else:
+            if attempt == max_retries - 1:
+                logger.error(f"{chain_name}: Max retries exceeded for blocks {block_start}-{block_end}")
                 raise
-    logger.error(f"{chain_name}: Max retries exceeded for blocks {block_start}-{block_end}")
-    return [], w3
+            rate_limiter.on_rate_limited(rate_limit_backoff(attempt))
+            logger.warning(f"{chain_name}: Rate limited fetching logs {block_start}-{block_end}. Retrying in {rate_limit_backoff(attempt):g} seconds...")
 
-def process_log_entry(log: dict, chain_name: str, dao_address: str, portals_contracts: List[str], w3: Web3) -> Optional[dict]:
+def prefetch_log_context(
+    w3: Web3,
+    logs: List[Any],
+    chain_name: str,
+    dao_address: str,
+    rate_limiter: Optional[RateLimiter] = None
+) -> (Dict[int, int], Dict[str, dict]):
+    """
+    Fetch block timestamps and transactions for a batch of logs in batched JSON-RPC requests.
+    Transactions are only fetched for Transfers to the DAO, the only logs whose router check needs one.
+    Args:
+        w3 (Web3): Web3 provider.
+        logs (List[Any]): Logs returned by eth_getLogs.
+        chain_name (str): Name of the chain.
+        dao_address (str): DAO address.
+        rate_limiter (Optional[RateLimiter]): Per-chain request pacing, shared with log fetching.
+    Returns:
+        (Dict[int, int], Dict[str, dict]): Block timestamps by number and transactions by 0x-prefixed hash.
+    """
+    if not logs:
+        return {}, {}
+    try:
+        block_timestamps = get_block_timestamps(w3, (log['blockNumber'] for log in logs), rate_limiter)
+        dao_bytes = address_bytes(dao_address)
+        transactions = get_transactions(w3, (
+            to_hex(log['transactionHash']) for log in logs
+            if bytes(log['topics'][0]) == ERC20_TRANSFER_TOPIC_BYTES and bytes(log['topics'][2])[-20:] == dao_bytes
+        ), rate_limiter)
+        return block_timestamps, transactions
+    except Exception as e:
+        logger.warning(f"[{chain_name}] Batched block/tx lookup failed, falling back to per-log requests: {e}")
+        return {}, {}
+
+def process_log_entry(
+    log: dict,
+    chain_name: str,
+    dao_address: str,
+    portals_contracts: List[str],
+    w3: Web3,
+    block_timestamps: Optional[Dict[int, int]] = None,
+    transactions: Optional[Dict[str, dict]] = None,
+    router_addresses: Optional[frozenset] = None
+) -> Optional[dict]:
     """
     Process a single log entry and return an event dict if relevant.
     Args:
@@ -214,21 +295,48 @@ def process_log_entry(log: dict, chain_name: str, dao_address: str, portals_cont
         dao_address (str): DAO address.
         portals_contracts (List[str]): List of Portals router addresses.
         w3 (Web3): Web3 provider.
+        block_timestamps (Optional[Dict[int, int]]): Prefetched block timestamps.
+        transactions (Optional[Dict[str, dict]]): Prefetched transactions by hash.
+        router_addresses (Optional[frozenset]): Prebuilt router_address_set(portals_contracts).
     Returns:
         Optional[dict]: Parsed event dict or None.
     """
-    event_topic = log['topics'][0].hex()
-    if not event_topic.startswith('0x'):
-        event_topic = '0x' + event_topic
-    if event_topic == ERC20_TRANSFER_TOPIC:
-        return parse_erc20_transfer_event(log, chain_name, dao_address, portals_contracts, w3)
-    elif event_topic == PORTALS_EVENT_TOPIC:
-        return parse_portals_event(log, chain_name, w3)
+    event_topic = bytes(log['topics'][0])
+    if event_topic == ERC20_TRANSFER_TOPIC_BYTES:
+        return parse_erc20_transfer_event(
+            log, chain_name, dao_address, portals_contracts, w3, block_timestamps, transactions, router_addresses
+        )
+    elif event_topic == PORTALS_EVENT_TOPIC_BYTES:
+        return parse_portals_event(log, chain_name, w3, block_timestamps)
     else:
-        logger.debug(f"Skipping log with unknown event topic: {event_topic}")
+        logger.debug(f"Skipping log with unknown event topic: 0x{event_topic.hex()}")
         return None
 
-def parse_erc20_transfer_event(log: dict, chain_name: str, dao_address: str, portals_contracts: List[str], w3: Web3) -> Optional[dict]:
+def get_log_timestamp(w3: Web3, block_number: int, block_timestamps: Optional[Dict[int, int]] = None) -> int:
+    """
+    Get a block timestamp, preferring prefetched values over a get_block call.
+    Args:
+        w3 (Web3): Web3 provider.
+        block_number (int): Block number.
+        block_timestamps (Optional[Dict[int, int]]): Prefetched block timestamps.
+    Returns:
+        int: Block timestamp, or 0 if the block could not be fetched.
+    """
+    try:
+        return get_block_timestamp(w3, block_number, block_timestamps)
+    except Exception:
+        return 0
+
+def parse_erc20_transfer_event(
+    log: dict,
+    chain_name: str,
+    dao_address: str,
+    portals_contracts: List[str],
+    w3: Web3,
+    block_timestamps: Optional[Dict[int, int]] = None,
+    transactions: Optional[Dict[str, dict]] = None,
+    router_addresses: Optional[frozenset] = None
+) -> Optional[dict]:
     """
     Parse an ERC-20 Transfer event log.
     Args:
@@ -237,30 +345,32 @@ def parse_erc20_transfer_event(log: dict, chain_name: str, dao_address: str, por
         dao_address (str): DAO address.
         portals_contracts (List[str]): List of Portals router addresses.
         w3 (Web3): Web3 provider.
+        block_timestamps (Optional[Dict[int, int]]): Prefetched block timestamps.
+        transactions (Optional[Dict[str, dict]]): Prefetched transactions by hash.
+        router_addresses (Optional[frozenset]): Prebuilt router_address_set(portals_contracts).
     Returns:
         Optional[dict]: Parsed event dict or None.
     """
     try:
-        from_address = to_checksum_address('0x' + log['topics'][1].hex()[-40:])
-        to_address = to_checksum_address('0x' + log['topics'][2].hex()[-40:])
-        dao_address_norm = to_checksum_address(dao_address)
-        if to_address != dao_address_norm:
+        recipient_bytes = bytes(log['topics'][2])[-20:]
+        if recipient_bytes != address_bytes(dao_address):
             logger.debug(f"Skipping - recipient is not DAO address")
             return None
+        from_address = to_checksum_address(bytes(log['topics'][1])[-20:])
+        to_address = to_checksum_address(recipient_bytes)
         tx_hash = log['transactionHash'].hex()
-        tx = w3.eth.get_transaction(tx_hash)
+        tx = (transactions or {}).get(to_hex(log['transactionHash'])) or w3.eth.get_transaction(tx_hash)
         is_portals_router = False
         if tx['to']:
-            tx_to_norm = to_checksum_address(tx['to'])
-            is_portals_router = any(to_checksum_address(router) == tx_to_norm for router in portals_contracts)
+            if router_addresses is None:
+                router_addresses = router_address_set(portals_contracts)
+            # tx.to is arbitrary per log, so it is converted uncached (address_bytes is for config addresses)
+            is_portals_router = to_canonical_address(tx['to']) in router_addresses
         block_number = log['blockNumber']
+        timestamp = get_log_timestamp(w3, block_number, block_timestamps)
         try:
-            block = w3.eth.get_block(block_number)
-            timestamp = block['timestamp']
-        except Exception:
-            timestamp = 0
-        try:
-            amount = int(log['data'].hex(), 16)
+            # Transfer's only non-indexed field is the uint256 value in the first data word
+            amount = int.from_bytes(bytes(log['data'])[:32], 'big')
         except Exception as e:
             logger.warning(f"Failed to parse amount from log data: {e}")
             amount = 0
@@ -286,35 +396,32 @@ def parse_erc20_transfer_event(log: dict, chain_name: str, dao_address: str, por
         logger.warning(f"Malformed ERC-20 log: {e}")
         return None
 
-def parse_portals_event(log: dict, chain_name: str, w3: Web3) -> Optional[dict]:
+def parse_portals_event(log: dict, chain_name: str, w3: Web3, block_timestamps: Optional[Dict[int, int]] = None) -> Optional[dict]:
     """
     Parse a Portals event log.
     Args:
         log (dict): Log entry.
         chain_name (str): Name of the chain.
         w3 (Web3): Web3 provider.
+        block_timestamps (Optional[Dict[int, int]]): Prefetched block timestamps.
     Returns:
         Optional[dict]: Parsed event dict or None.
     """
     try:
-        sender = '0x' + log['topics'][1].hex()[-40:]
-        broadcaster = '0x' + log['topics'][2].hex()[-40:]
-        partner = '0x' + log['topics'][3].hex()[-40:]
+        # Indexed addresses are the low 20 bytes of each topic; data is five 32-byte words
+        sender = '0x' + bytes(log['topics'][1])[-20:].hex()
+        broadcaster = '0x' + bytes(log['topics'][2])[-20:].hex()
+        partner = '0x' + bytes(log['topics'][3])[-20:].hex()
         data = log['data']
-        data_hex = data.hex() if hasattr(data, 'hex') else data
-        data_bytes = bytes.fromhex(data_hex[2:])
-        input_token = '0x' + data_bytes[0:32].hex()[-40:]
+        data_bytes = to_bytes(hexstr=data) if isinstance(data, str) else bytes(data)
+        input_token = '0x' + data_bytes[12:32].hex()
         input_amount = int.from_bytes(data_bytes[32:64], 'big')
-        output_token = '0x' + data_bytes[64:96].hex()[-40:]
+        output_token = '0x' + data_bytes[76:96].hex()
         output_amount = int.from_bytes(data_bytes[96:128], 'big')
-        recipient = '0x' + data_bytes[128:160].hex()[-40:]
+        recipient = '0x' + data_bytes[140:160].hex()
         tx_hash = log['transactionHash'].hex()
         block_number = log['blockNumber']
-        try:
-            block = w3.eth.get_block(block_number)
-            timestamp = block['timestamp']
-        except Exception:
-            timestamp = 0
+        timestamp = get_log_timestamp(w3, block_number, block_timestamps)
         return {
             'chain': chain_name,
             'tx_hash': tx_hash,
@@ -352,7 +459,7 @@ def scan_chain(
         dao_address (str): DAO address.
         portals_contracts (List[str]): List of Portals router addresses.
         progress (dict): Progress data.
-        batch_size (int): Batch size for log fetching.
+        batch_size (int): Initial batch size when the chain config has no batch_size.
         today_mode (bool): Whether to scan only today's blocks.
         alchemy_urls (dict): Alchemy fallback URLs.
     Returns:
@@ -362,14 +469,17 @@ def scan_chain(
     if not w3.is_connected():
         logger.error(f"Failed to connect to {chain_name}")
         return 0
-    start_block, latest_block = get_block_range(w3, chain_cfg, progress, today_mode)
-    min_batch, max_batch = 10, 1000
-    adaptive_batch = batch_size
+    start_block, latest_block = get_block_range(w3, chain_name, chain_cfg, progress, today_mode)
+    rate_limiter = RateLimiter(chain_cfg.get('requests_per_second', DEFAULT_REQUESTS_PER_SECOND))
+    # Start from the chain's configured window; providers accept thousands of blocks for a topic-filtered query
+    adaptive_batch = chain_cfg.get('batch_size', batch_size)
+    streak = 0
     block_start = start_block
     total_found = 0
+    dao_topic = '0x' + to_canonical_address(dao_address).hex().rjust(64, '0')
+    router_addresses = router_address_set(portals_contracts)
     while block_start <= latest_block:
         block_end = min(block_start + adaptive_batch - 1, latest_block)
-        dao_topic = '0x' + to_canonical_address(dao_address).hex().rjust(64, '0')
         filter_params = {
             'fromBlock': block_start,
             'toBlock': block_end,
@@ -381,79 +491,113 @@ def scan_chain(
         }
         logger.info(f"[{chain_name}] filter_params: {filter_params} (batch size: {adaptive_batch})")
         try:
-            logs, new_w3 = fetch_logs_with_retry(w3, filter_params, chain_name, block_start, block_end, fallback_w3=fallback_w3)
+            logs, new_w3 = fetch_logs_with_retry(w3, filter_params, chain_name, block_start, block_end, fallback_w3=fallback_w3, rate_limiter=rate_limiter)
             if logs == 'SWITCH_TO_ALCHEMY':
                 w3 = new_w3
-                logs, _ = fetch_logs_with_retry(w3, filter_params, chain_name, block_start, block_end, fallback_w3=None)
+                logs, _ = fetch_logs_with_retry(w3, filter_params, chain_name, block_start, block_end, fallback_w3=None, rate_limiter=rate_limiter)
             if not isinstance(logs, list):
                 logs = []
-            if adaptive_batch < max_batch:
-                adaptive_batch = min(adaptive_batch * 2, max_batch)
-            logger.info(f"[{chain_name}] Success: {len(logs)} logs, increasing batch size to {adaptive_batch}")
+            # Same range policy as shared.rpc.iter_log_chunks (this loop also fails over between providers)
+            adaptive_batch, streak = next_log_range(adaptive_batch, False, streak + 1)
+            logger.info(f"[{chain_name}] Success: {len(logs)} logs, next batch size {adaptive_batch}")
         except Exception as e:
-            if '400' in str(e) and adaptive_batch > min_batch:
-                adaptive_batch = max(adaptive_batch // 2, min_batch)
-                logger.warning(f"[{chain_name}] 400 error, reducing batch size to {adaptive_batch}")
+            if ('400' in str(e) or is_log_limit_error(e)) and adaptive_batch > 1:
+                adaptive_batch, streak = next_log_range(adaptive_batch, True, streak)
+                logger.warning(f"[{chain_name}] Range rejected ({e}), reducing batch size to {adaptive_batch}")
                 continue
+            if is_rate_limit_error(e):
+                # Stop without saving progress, so the next pass rescans this range instead of skipping it
+                logger.error(f"{chain_name}: Still rate limited at blocks {block_start}-{block_end}; stopping this pass")
+                break
             logger.error(f"{chain_name}: Error fetching logs {block_start}-{block_end}: {e}")
             block_start += adaptive_batch
             continue
-        events = []
-        for log in logs:
-            event = process_log_entry(log, chain_name, dao_address, portals_contracts, w3)
-            if event:
-                events.append(event)
+        block_timestamps, transactions = prefetch_log_context(w3, logs, chain_name, dao_address, rate_limiter)
+        events = [
+            event for event in (
+                process_log_entry(
+                    log, chain_name, dao_address, portals_contracts, w3, block_timestamps, transactions, router_addresses
+                )
+                for log in logs
+            ) if event
+        ]
+        # An insert error propagates out of the scan, so progress is never saved past unstored events
         save_events_to_db(events)
         total_found += len(events)
-        progress[chain_name] = block_end + 1
-        save_progress(progress)
+        with _PROGRESS_LOCK:
+            progress[chain_name] = block_end + 1
+            save_progress(progress)
         logger.info(f"{chain_name}: {len(events)} events in blocks {block_start}-{block_end}")
-        time.sleep(1)
         block_start = block_end + 1
     return total_found
 
 def save_events_to_db(events: List[dict]) -> None:
     """
-    Save a list of event dicts to the database.
+    Save Transfer and Portal events to portals_transactions.
     Args:
         events (List[dict]): List of event dicts.
     """
     if not events:
         return
-    with connect_db(DB_PATH) as conn:
-        cursor = conn.cursor()
-        for event in events:
+    # Transfer and Portal events share one column list; fields an event type lacks are stored as NULL
+    insert_rows(DB_PATH, 'portals_transactions', EVENT_COLUMNS, (tuple(event.get(col) for col in EVENT_COLUMNS) for event in events))
+
+def scan_all_chains(
+    chains: dict,
+    dao_addresses: dict,
+    portals_contracts: List[str],
+    progress: dict,
+    batch_size: int,
+    today_mode: bool = False,
+    alchemy_urls: dict = None
+) -> Dict[str, int]:
+    """
+    Scan every configured chain concurrently (chains are independent and RPC-bound).
+    Args:
+        chains (dict): Chain configurations by name.
+        dao_addresses (dict): DAO address by chain name.
+        portals_contracts (List[str]): List of Portals router addresses.
+        progress (dict): Progress data, shared across chains.
+        batch_size (int): Initial batch size for log fetching.
+        today_mode (bool): Whether to scan only today's blocks.
+        alchemy_urls (dict): Alchemy fallback URLs.
+    Returns:
+        Dict[str, int]: Events found per chain (chains whose scan raised are omitted).
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(chains))) as executor:
+        futures = {
+            executor.submit(
+                scan_chain,
+                chain_name,
+                chain_cfg,
+                dao_addresses.get(chain_name),
+                portals_contracts,
+                progress,
+                batch_size,
+                today_mode=today_mode,
+                alchemy_urls=alchemy_urls
+            ): chain_name
+            for chain_name, chain_cfg in chains.items()
+        }
+        for future in as_completed(futures):
+            chain_name = futures[future]
             try:
-                if event['event_type'] == 'ERC20_TRANSFER':
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO portals_transactions 
-                        (chain, tx_hash, block_number, block_timestamp, event_type, token, amount, sender, recipient, is_portals_router)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        event['chain'], event['tx_hash'], event['block_number'], event['block_timestamp'], 
-                        event['event_type'], event['token'], event['amount'], event['sender'], event['recipient'],
-                        event.get('is_portals_router', False)
-                    ))
-                elif event['event_type'] == 'portals_event':
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO portals_transactions 
-                        (chain, tx_hash, block_number, block_timestamp, event_type, sender, recipient, 
-                         input_token, input_amount, output_token, output_amount, broadcaster, partner)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        event['chain'], event['tx_hash'], event['block_number'], event['block_timestamp'],
-                        event['event_type'], event['sender'], event['recipient'], event['input_token'],
-                        event['input_amount'], event['output_token'], event['output_amount'],
-                        event['broadcaster'], event['partner']
-                    ))
+                results[chain_name] = future.result()
             except Exception as e:
-                logger.error(f"Failed to save event: {e}")
+                logger.error(f"{chain_name}: Error in scan: {e}")
+    return results
 
 def main() -> None:
     """
     Main entry point for the Portals affiliate fee listener.
-    Loads config, sets up logging and database, and starts event processing.
+    Loads config, sets up logging and database, and scans all chains concurrently.
     """
+    parser = argparse.ArgumentParser(description='Portals affiliate fee listener')
+    parser.add_argument('--today', action='store_true', help="Only scan today's blocks")
+    parser.add_argument('--interval', type=int, default=0, help='Rescan every N seconds instead of exiting after one pass')
+    args = parser.parse_args()
+
     logger = setup_logger("portals_listener")
     config = load_config("listeners/portals_listener_config.yaml")
     db_path = config.get("db_path", "portals_affiliate_fees.sqlite")
@@ -490,27 +634,24 @@ def main() -> None:
     }
 
     logger.info("🚀 Starting Portals affiliate fee listener (refactored)")
-    results = {}
-    for chain_name, chain_cfg in chains.items():
-        dao_address = dao_addresses.get(chain_name)
-        batch_size = 10  # You can make this configurable
-        try:
-            found = scan_chain(
-                chain_name,
-                chain_cfg,
-                dao_address,
-                portals_contracts,
-                progress,
-                batch_size,
-                today_mode=args.today,
-                alchemy_urls=alchemy_urls
-            )
-            results[chain_name] = found
-        except Exception as e:
-            logger.error(f"{chain_name}: Error in scan: {e}")
-    logger.info("\n✅ Portals listener completed!")
-    for chain, found in results.items():
-        logger.info(f"   {chain}: {found} events found")
+    batch_size = 10  # Fallback for chains without a configured batch_size
+    # With --interval the process stays resident, reusing config, the pooled session and in-memory progress
+    today_mode = args.today
+    while True:
+        results = scan_all_chains(
+            chains, dao_addresses, portals_contracts, progress, batch_size,
+            today_mode=today_mode, alchemy_urls=alchemy_urls
+        )
+        logger.info("\n✅ Portals listener completed!")
+        for chain, found in results.items():
+            logger.info(f"   {chain}: {found} events found")
+        if not args.interval:
+            break
+        # --today only picks the first pass's start; later passes resume from the progress it saved
+        # (portals_transactions has no unique key, so rescanning from midnight would duplicate events)
+        today_mode = False
+        logger.info(f"Next scan in {args.interval} seconds")
+        time.sleep(args.interval)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
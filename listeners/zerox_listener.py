@@ -13,18 +13,29 @@ Example usage:
 #!/usr/bin/env python3
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from web3 import Web3
 from eth_utils import to_checksum_address
 
-from shared.logging import setup_logger
-from shared.db import connect_db, ensure_schema
+from shared.logging import setup_logger, get_logger
+from shared.db import connect_db, ensure_schema, insert_rows
 from shared.config import load_config
+from shared.rpc import RateLimiter, get_block_timestamp, get_http_provider, iter_log_chunks, try_get_block_timestamps
+
+logger = get_logger(__name__)
 
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'zerox_listener_config.yaml')
 DB_PATH = 'shapeshift_zerox_transactions.db'
 
+# Insert column order for zerox_transactions (matches parse_zerox_event keys)
+EVENT_COLUMNS = (
+    'chain', 'tx_hash', 'block_number', 'block_timestamp', 'event_type', 'maker', 'taker',
+    'input_token', 'output_token', 'input_amount', 'output_amount', 'protocol_fee',
+    'affiliate_fee_amount', 'affiliate_fee_usd', 'volume_usd'
+)
+
 # --- DB ---
 def init_database() -> None:
     """Initialize the database schema using shared.db.ensure_schema."""
@@ -55,48 +66,20 @@ def init_database() -> None:
 # --- Web3 Helpers ---
 def get_web3_provider(chain_name: str, chain_cfg: dict, logger) -> Web3:
     """Get Web3 provider for a chain."""
-    w3 = Web3(Web3.HTTPProvider(chain_cfg['rpc_url']))
+    w3 = Web3(get_http_provider(chain_cfg['rpc_url']))
     if w3.is_connected():
         return w3
     logger.error(f"Failed to connect to {chain_cfg['rpc_url']}")
     return None
 
-def fetch_logs(web3: Web3, contract_address: str, from_block: int, to_block: int, logger) -> List[dict]:
-    """
-    Fetch logs for a contract address and block range.
-    
-    Args:
-        web3: Web3 instance
-        contract_address: Contract address as hex string
-        from_block: Starting block number
-        to_block: Ending block number
-        logger: Logger instance
-        
-    Returns:
-        List of log events
-    """
-    filter_params = {
-        'fromBlock': from_block,
-        'toBlock': to_block,
-        'address': contract_address  # Ensure this is a string
-    }
-    logger.info(f"filter_params: {filter_params}")
-    try:
-        logs = web3.eth.get_logs(filter_params)
-        return logs
-    except Exception as e:
-        logger.error(f"Error fetching logs {from_block}-{to_block}: {e}")
-        return []
-
 # --- Event Parsing ---
-def parse_zerox_event(log: dict, chain_name: str, w3: Web3) -> Optional[dict]:
+def parse_zerox_event(log: dict, chain_name: str, w3: Web3, block_timestamps: Optional[Dict[int, int]] = None) -> Optional[dict]:
     """Parse a 0x Protocol event log. (Stub: implement actual parsing logic)"""
     # This is a placeholder. Actual event parsing logic should be implemented here.
     try:
         tx_hash = log['transactionHash'].hex()
         block_number = log['blockNumber']
-        block = w3.eth.get_block(block_number)
-        timestamp = block['timestamp']
+        timestamp = get_block_timestamp(w3, block_number, block_timestamps)
         # Example fields (replace with actual event parsing):
         return {
             'chain': chain_name,
@@ -148,16 +131,13 @@ def scan_chain(chain_name: str, chain_cfg: dict, logger) -> int:
         return 0
     
     total_found = 0
-    for from_block in range(start_block, current_block, chunk_size):
-        to_block = min(from_block + chunk_size - 1, current_block)
-        
-        logs = fetch_logs(w3, contract_address, from_block, to_block, logger)
+    # One limiter paces both the log requests and the batched block lookups
+    rate_limiter = RateLimiter()
+    # Chunk size starts from config and adapts to the provider's eth_getLogs limits
+    for from_block, to_block, logs in iter_log_chunks(w3, {'address': contract_address}, start_block, current_block, chunk_size, rate_limiter):
         if logs:
-            events = []
-            for log in logs:
-                event = parse_zerox_event(log, chain_name, w3)
-                if event:
-                    events.append(event)
+            block_timestamps = try_get_block_timestamps(w3, (log['blockNumber'] for log in logs), rate_limiter)
+            events = [event for event in (parse_zerox_event(log, chain_name, w3, block_timestamps) for log in logs) if event]
             
             if events:
                 save_events_to_db(events)
@@ -168,24 +148,34 @@ def scan_chain(chain_name: str, chain_cfg: dict, logger) -> int:
 
 # --- DB Save ---
 def save_events_to_db(events: List[dict]) -> None:
-    """Save processed events to database."""
-    if not events:
-        return
-    with connect_db(DB_PATH) as conn:
-        cursor = conn.cursor()
-        for event in events:
+    """Save processed events to zerox_transactions."""
+    if events:
+        insert_rows(DB_PATH, 'zerox_transactions', EVENT_COLUMNS, (tuple(event[col] for col in EVENT_COLUMNS) for event in events))
+
+def scan_all_chains(chains: dict, logger) -> Dict[str, int]:
+    """
+    Scan every configured chain concurrently (chains are independent and RPC-bound).
+    
+    Args:
+        chains: Chain configurations by name
+        logger: Logger instance
+        
+    Returns:
+        Events found per chain (chains whose scan raised are omitted)
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(chains))) as executor:
+        futures = {
+            executor.submit(scan_chain, chain_name, chain_cfg, logger): chain_name
+            for chain_name, chain_cfg in chains.items()
+        }
+        for future in as_completed(futures):
+            chain_name = futures[future]
             try:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO zerox_transactions 
-                    (chain, tx_hash, block_number, block_timestamp, event_type, maker, taker, input_token, output_token, input_amount, output_amount, protocol_fee, affiliate_fee_amount, affiliate_fee_usd, volume_usd)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    event['chain'], event['tx_hash'], event['block_number'], event['block_timestamp'], event['event_type'],
-                    event['maker'], event['taker'], event['input_token'], event['output_token'], event['input_amount'],
-                    event['output_amount'], event['protocol_fee'], event['affiliate_fee_amount'], event['affiliate_fee_usd'], event['volume_usd']
-                ))
+                results[chain_name] = future.result()
             except Exception as e:
-                logger.error(f"Failed to save event: {e}")
+                logger.error(f"{chain_name}: Error in scan: {e}")
+    return results
 
 # --- Main ---
 def main() -> None:
@@ -212,23 +202,11 @@ def main() -> None:
     ensure_schema(conn, schema_sql)
     
     logger.info("🚀 Starting 0x Protocol affiliate fee listener (refactored)")
-    chains = config['chains']
-    total_found = 0
-    
-    for chain_name, chain_cfg in chains.items():
-        try:
-            found = scan_chain(chain_name, chain_cfg, logger)
-            total_found += found
-            logger.info(f"   {chain_name}: {found} events found")
-        except Exception as e:
-            logger.error(f"{chain_name}: Error in scan: {e}")
+    results = scan_all_chains(config['chains'], logger)
     
     logger.info(f"\n✅ 0x Protocol listener completed!")
-    logger.info(f"   ethereum: {total_found} events found")
-    logger.info(f"   polygon: {total_found} events found")
-    logger.info(f"   arbitrum: {total_found} events found")
-    logger.info(f"   optimism: {total_found} events found")
-    logger.info(f"   base: {total_found} events found")
+    for chain_name, found in results.items():
+        logger.info(f"   {chain_name}: {found} events found")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -15,6 +15,9 @@ class PriceFetcher:
             'Accepts': 'application/json',
             'X-CMC_PRO_API_KEY': api_key,
         }
+        # Keep-alive session so repeated quote requests reuse the TCP/TLS connection
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
         
     def get_token_prices(self, symbols: list) -> Dict[str, float]:
         """Get current prices for a list of token symbols"""
@@ -28,7 +31,7 @@ class PriceFetcher:
         }
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -2,8 +2,11 @@ import sqlite3
 import os
 from typing import Optional, Dict
 from datetime import datetime
+from functools import lru_cache
 from web3 import Web3
 
+from shared.rpc import get_http_provider
+
 _DB_PATH = os.path.expanduser('~/.block_tracker.sqlite')
 
 # RPC endpoints for different chains
@@ -35,26 +38,35 @@ def init_database():
         conn.execute(_SCHEMA)
         conn.commit()
 
+def find_block_by_timestamp(w3: Web3, target_timestamp: int, start_block: int, end_block: int) -> int:
+    """
+    Binary search for the first block with timestamp >= target_timestamp.
+    Args:
+        w3 (Web3): Web3 provider.
+        target_timestamp (int): Target UTC timestamp.
+        start_block (int): Start block number.
+        end_block (int): End block number.
+    Returns:
+        int: Block number with timestamp >= target_timestamp.
+    """
+    low = start_block
+    high = end_block
+    result = end_block
+    while low <= high:
+        mid = (low + high) // 2
+        block = w3.eth.get_block(mid)
+        if block['timestamp'] < target_timestamp:
+            low = mid + 1
+        else:
+            result = mid
+            high = mid - 1
+    return result
+
+@lru_cache(maxsize=None)
 def get_july_1st_block(chain: str) -> int:
-    """Get the block number closest to July 1st, 2024 for a given chain."""
-    w3 = Web3(Web3.HTTPProvider(RPC_ENDPOINTS[chain]))
-    
-    # Binary search to find the block closest to July 1st
-    left = 0
-    right = w3.eth.block_number
-    
-    while left < right:
-        mid = (left + right) // 2
-        try:
-            block = w3.eth.get_block(mid)
-            if block['timestamp'] < JULY_1ST_TIMESTAMP:
-                left = mid + 1
-            else:
-                right = mid
-        except:
-            right = mid - 1
-    
-    return left
+    """Get the first block at or after July 1st, 2024 for a given chain (cached; past blocks never change)."""
+    w3 = Web3(get_http_provider(RPC_ENDPOINTS[chain]))
+    return find_block_by_timestamp(w3, JULY_1ST_TIMESTAMP, 0, w3.eth.block_number)
 
 def get_last_processed_block(listener_name: str) -> Optional[int]:
     """Get the last processed block for a listener."""
@@ -64,11 +76,15 @@ def get_last_processed_block(listener_name: str) -> Optional[int]:
         return row[0] if row else None
 
 def set_last_processed_block(listener_name: str, chain: str, block_number: int):
-    """Set the last processed block for a listener."""
+    """Set the last processed block for a listener (upserted in place, no delete + reinsert)."""
     with sqlite3.connect(_DB_PATH) as conn:
         conn.execute('''
-            INSERT OR REPLACE INTO block_tracking (listener_name, chain, last_processed_block, last_run_timestamp)
+            INSERT INTO block_tracking (listener_name, chain, last_processed_block, last_run_timestamp)
             VALUES (?, ?, ?, ?)
+            ON CONFLICT(listener_name) DO UPDATE SET
+                chain = excluded.chain,
+                last_processed_block = excluded.last_processed_block,
+                last_run_timestamp = excluded.last_run_timestamp
         ''', (listener_name, chain, block_number, int(datetime.now().timestamp())))
         conn.commit()
 
@@ -10,6 +10,7 @@ Example usage:
 import os
 import yaml
 import re
+from functools import lru_cache
 from dotenv import load_dotenv
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -18,6 +19,21 @@ ENV_PATH = os.path.join(PROJECT_ROOT, '.env')
 # Always load .env from the project root
 load_dotenv(ENV_PATH)
 
+_ENV_VAR_PATTERN = re.compile(r'\$\{([^}]+)\}')
+
+@lru_cache(maxsize=32)
+def _parse_yaml(config_path, mtime_ns):
+    """
+    Parse a YAML file, memoized by path and modification time.
+    Args:
+        config_path (str): Absolute path to the YAML file.
+        mtime_ns (int): File modification time; a changed file gets a new cache entry.
+    Returns:
+        dict: The parsed (not yet env-substituted) config. Callers must not mutate it.
+    """
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
 def load_yaml_config(config_path):
     """
     Load a YAML config file and substitute ${VAR} with environment variables.
@@ -26,12 +42,12 @@ def load_yaml_config(config_path):
     Returns:
         dict: The loaded and environment-substituted config.
     """
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
-    pattern = re.compile(r'\$\{([^}]+)\}')
+    config_path = os.path.abspath(config_path)
+    config = _parse_yaml(config_path, os.stat(config_path).st_mtime_ns)
+    # Substitution runs on every call (env may change) and builds new dicts/lists, leaving the cached parse untouched
     def replace_env(val):
         if isinstance(val, str):
-            return pattern.sub(lambda m: os.getenv(m.group(1), m.group(0)), val)
+            return _ENV_VAR_PATTERN.sub(lambda m: os.getenv(m.group(1), m.group(0)), val)
         if isinstance(val, dict):
             return {k: replace_env(v) for k, v in val.items()}
         if isinstance(val, list):
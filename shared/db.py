@@ -4,14 +4,39 @@ shared.db
 Helpers for SQLite database connection and schema management.
 
 Example usage:
-    from shared.db import connect_db, ensure_schema
+    from shared.db import connect_db, ensure_schema, insert_rows
     conn = connect_db('mydb.sqlite')
     ensure_schema(conn, 'CREATE TABLE IF NOT EXISTS ...')
+    insert_rows('mydb.sqlite', 'events', ('tx_hash', 'amount'), [('0xabc', '100')])
 """
 import sqlite3
 import os
 from contextlib import contextmanager
-from typing import Optional, Any
+from typing import Iterable, Optional, Any, Sequence
+
+# Applied to every connection: WAL lets listeners write while reports/consolidation read,
+# and synchronous=NORMAL is durable under WAL with far fewer fsyncs.
+_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA temp_store=MEMORY',
+)
+
+# Directories already created by ensure_db_dir in this process (skips a makedirs per connection)
+_ENSURED_DIRS = set()
+
+def configure_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """
+    Apply the shared PRAGMA settings (WAL journal, page cache size) to a connection.
+    Args:
+        conn (sqlite3.Connection): Open SQLite connection.
+    Returns:
+        sqlite3.Connection: The same connection, for chaining.
+    """
+    for pragma in _PRAGMAS:
+        conn.execute(pragma)
+    return conn
 
 def ensure_db_dir(db_path):
     """
@@ -19,7 +44,11 @@ def ensure_db_dir(db_path):
     Args:
         db_path (str): Path to the SQLite database file.
     """
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    directory = os.path.dirname(db_path)
+    if not directory or directory in _ENSURED_DIRS:
+        return
+    os.makedirs(directory, exist_ok=True)
+    _ENSURED_DIRS.add(directory)
 
 @contextmanager
 def db_connection(db_path):
@@ -31,7 +60,7 @@ def db_connection(db_path):
         sqlite3.Connection: SQLite connection object.
     """
     ensure_db_dir(db_path)
-    conn = sqlite3.connect(db_path)
+    conn = configure_connection(sqlite3.connect(db_path))
     try:
         yield conn
     finally:
@@ -68,7 +97,7 @@ def connect_db(db_path: str) -> sqlite3.Connection:
     """
     try:
         conn = sqlite3.connect(db_path)
-        return conn
+        return configure_connection(conn)
     except sqlite3.Error as e:
         raise RuntimeError(f"Failed to connect to database: {e}")
 
@@ -91,4 +120,36 @@ def ensure_schema(conn: sqlite3.Connection, schema_sql: str) -> None:
         with conn:
             conn.executescript(schema_sql)
     except sqlite3.Error as e:
-        raise RuntimeError(f"Failed to ensure schema: {e}") 
\ No newline at end of file
+        raise RuntimeError(f"Failed to ensure schema: {e}")
+
+def insert_rows(db_path: str, table: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+    """
+    Insert rows into a table with a single executemany, skipping rows that violate a UNIQUE constraint.
+
+    The insert runs in one transaction; if it fails, nothing is written and the error is raised,
+    so callers never record progress past rows that were not stored.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+        table (str): Table name.
+        columns (Sequence[str]): Column names, in the order of each row's values.
+        rows (Iterable[tuple]): Row value tuples.
+
+    Returns:
+        int: Number of rows inserted.
+
+    Raises:
+        sqlite3.Error: If the database cannot be opened or the insert fails (e.g. "database is locked").
+
+    Example:
+        >>> insert_rows('mydb.sqlite', 'events', ('tx_hash', 'amount'), [('0xabc', '100')])
+        1
+    """
+    sql = f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    conn = configure_connection(sqlite3.connect(db_path))
+    try:
+        with conn:
+            cursor = conn.executemany(sql, rows)
+        return max(cursor.rowcount, 0)
+    finally:
+        conn.close()
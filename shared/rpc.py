@@ -0,0 +1,466 @@
+"""
+shared.rpc
+
+Helpers for raw JSON-RPC access to EVM nodes, for calls that web3.py
+would otherwise issue one HTTP round trip at a time.
+
+Example usage:
+    from shared.rpc import get_http_provider, get_block_timestamps
+    w3 = Web3(get_http_provider(rpc_url))
+    timestamps = get_block_timestamps(w3, {log['blockNumber'] for log in logs})
+"""
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from web3 import HTTPProvider, Web3
+
+from shared.logging import get_logger
+
+# orjson is optional; it only speeds up encoding/decoding of large batch payloads
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _dumps = orjson.dumps
+else:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode()
+
+logger = get_logger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_TIMEOUT = 30
+POOL_SIZE = 16
+# Transient node/provider failures are retried with exponential backoff (0.5s, 1s, 2s, ...).
+# 429s are deliberately not retried by the transport: they surface at once so callers can slow
+# their RateLimiter or fail over to another provider instead of waiting out a hidden backoff.
+RETRY_TOTAL = 5
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (502, 503, 504)
+# Attempts per request before a rate-limited call is given up; after each 429 the RateLimiter holds
+# requests back for RATE_LIMIT_BACKOFF * 2**attempt seconds (1+2+4+8+16 = 31s before the last attempt)
+RATE_LIMIT_RETRIES = 6
+RATE_LIMIT_BACKOFF = 1.0
+JSON_HEADERS = {'Content-Type': 'application/json'}
+# Client-side request budget per provider; halved on 429s, regained slowly on success (AIMD)
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+MIN_REQUESTS_PER_SECOND = 1.0
+MAX_REQUESTS_PER_SECOND = 50.0
+RATE_INCREASE_STEP = 0.5
+# eth_getLogs ranges shrink when a provider rejects them and grow 1.5x after a streak of successes
+MAX_LOG_RANGE = 10000
+LOG_RANGE_GROWTH_STREAK = 5
+# Provider error fragments (Infura, Alchemy, QuickNode, ...) meaning the range or result set was too large
+LOG_LIMIT_ERRORS = ('block range', 'more than 10000 results', 'query returned more than', '-32005', 'response size', 'limit exceeded')
+# A standalone 429 (not part of a block number or hash in the error text)
+_RATE_LIMIT_STATUS = re.compile(r'\b429\b')
+# Constant JSON-RPC envelope; only id, method and the encoded params are spliced in per call
+_REQUEST_TEMPLATE = b'{"jsonrpc":"2.0","id":%d,"method":"%s","params":%s}'
+
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Get the process-wide requests.Session shared by all RPC providers.
+
+    Connections are pooled per host so repeated RPCs (and concurrent scans
+    on worker threads) reuse TCP/TLS connections instead of reconnecting.
+    Gateway errors are retried with exponential backoff; 429s are not (see RETRY_STATUS_CODES).
+
+    Returns:
+        requests.Session: Shared session with a pooled HTTPAdapter mounted.
+    """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            retry = Retry(
+                total=RETRY_TOTAL,
+                backoff_factor=RETRY_BACKOFF_FACTOR,
+                status_forcelist=RETRY_STATUS_CODES,
+                allowed_methods=frozenset({'POST'}),
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _SESSION = session
+        return _SESSION
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket that paces requests to a provider's rate budget.
+
+    The refill rate adapts AIMD-style: on_rate_limited() halves it and
+    on_success() raises it by RATE_INCREASE_STEP, within the min/max bounds.
+
+    Example usage:
+        limiter = RateLimiter(chain_cfg.get('requests_per_second', DEFAULT_REQUESTS_PER_SECOND))
+        limiter.acquire()
+        logs = w3.eth.get_logs(filter_params)
+    """
+
+    def __init__(self, rate: float = DEFAULT_REQUESTS_PER_SECOND, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(self.rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, cost: float = 1.0) -> None:
+        """
+        Block until `cost` tokens are available, then consume them.
+
+        Args:
+            cost (float): Number of requests about to be sent.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= cost
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+    def on_rate_limited(self, backoff: float = 0.0) -> None:
+        """
+        Multiplicatively decrease the rate after a 429 and drain the bucket, so the next request waits.
+
+        Args:
+            backoff (float): Extra seconds every request through this limiter is held back.
+        """
+        with self._lock:
+            self._refill()
+            self.rate = max(MIN_REQUESTS_PER_SECOND, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0) - backoff * self.rate
+
+    def on_success(self) -> None:
+        """Additively increase the rate after a successful request."""
+        with self._lock:
+            self._refill()
+            self.rate = min(MAX_REQUESTS_PER_SECOND, self.rate + RATE_INCREASE_STEP)
+
+
+def rate_limit_backoff(attempt: int) -> float:
+    """
+    Seconds to hold a provider's requests back after the `attempt`-th (0-based) consecutive 429.
+
+    Args:
+        attempt (int): Number of the attempt that was rate limited.
+
+    Returns:
+        float: Backoff to pass to RateLimiter.on_rate_limited().
+    """
+    return RATE_LIMIT_BACKOFF * 2 ** attempt
+
+
+def get_http_provider(rpc_url: str) -> HTTPProvider:
+    """
+    Build a Web3 HTTPProvider that sends requests through the shared session.
+
+    web3's own exception retries are disabled: the session already retries transient
+    failures, and 429s are left to the caller's RateLimiter.
+
+    Args:
+        rpc_url (str): RPC endpoint URL.
+
+    Returns:
+        HTTPProvider: Provider bound to the pooled session.
+    """
+    return HTTPProvider(
+        rpc_url, request_kwargs={'timeout': DEFAULT_TIMEOUT}, session=get_session(), exception_retry_configuration=None
+    )
+
+
+def rpc_batch(
+    w3: Web3,
+    calls: List[Tuple[str, list]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    rate_limiter: Optional[RateLimiter] = None
+) -> List[Optional[Any]]:
+    """
+    Send JSON-RPC calls as batch arrays, `batch_size` calls per HTTP request.
+
+    Each HTTP request goes through the rate limiter; 429s slow it down and are retried
+    up to RATE_LIMIT_RETRIES attempts.
+
+    Args:
+        w3 (Web3): Web3 instance backed by an HTTP provider.
+        calls (List[Tuple[str, list]]): (method, params) pairs.
+        batch_size (int): Maximum number of calls per HTTP request.
+        rate_limiter (Optional[RateLimiter]): Request pacing for this provider (a default one is created if omitted).
+
+    Returns:
+        List[Optional[Any]]: Results in the same order as `calls`; None for calls that errored.
+
+    Raises:
+        RuntimeError: If the provider answers a batch with anything but a JSON array.
+    """
+    endpoint = w3.provider.endpoint_uri
+    rate_limiter = rate_limiter or RateLimiter()
+    results: List[Optional[Any]] = [None] * len(calls)
+    for offset in range(0, len(calls), batch_size):
+        chunk = calls[offset:offset + batch_size]
+        body = b'[' + b','.join(
+            _REQUEST_TEMPLATE % (offset + i, method.encode(), _dumps(params))
+            for i, (method, params) in enumerate(chunk)
+        ) + b']'
+        for attempt in range(RATE_LIMIT_RETRIES):
+            rate_limiter.acquire()
+            response = get_session().post(endpoint, data=body, headers=JSON_HEADERS, timeout=DEFAULT_TIMEOUT)
+            if response.status_code != 429:
+                rate_limiter.on_success()
+                break
+            if attempt < RATE_LIMIT_RETRIES - 1:
+                rate_limiter.on_rate_limited(rate_limit_backoff(attempt))
+        response.raise_for_status()
+        items = orjson.loads(response.content) if orjson else response.json()
+        if not isinstance(items, list):
+            # Providers that don't support batching answer with a single error object
+            error = items.get('error', items) if isinstance(items, dict) else items
+            raise RuntimeError(f"RPC batch request rejected by provider: {error}")
+        for item in items:
+            if 'error' in item:
+                logger.warning(f"RPC batch call {calls[item['id']][0]} failed: {item['error']}")
+                continue
+            results[item['id']] = item.get('result')
+    return results
+
+
+def get_block_timestamps(
+    w3: Web3, block_numbers: Iterable[int], rate_limiter: Optional[RateLimiter] = None
+) -> Dict[int, int]:
+    """
+    Fetch block timestamps for many blocks using batched eth_getBlockByNumber calls.
+
+    Args:
+        w3 (Web3): Web3 instance backed by an HTTP provider.
+        block_numbers (Iterable[int]): Block numbers to look up (duplicates are ignored).
+        rate_limiter (Optional[RateLimiter]): Request pacing for this provider.
+
+    Returns:
+        Dict[int, int]: Mapping of block number to UNIX timestamp; blocks that failed are omitted.
+    """
+    numbers = sorted(set(block_numbers))
+    blocks = rpc_batch(w3, [('eth_getBlockByNumber', [hex(n), False]) for n in numbers], rate_limiter=rate_limiter)
+    return {n: int(block['timestamp'], 16) for n, block in zip(numbers, blocks) if block}
+
+
+def try_get_block_timestamps(
+    w3: Web3, block_numbers: Iterable[int], rate_limiter: Optional[RateLimiter] = None
+) -> Dict[int, int]:
+    """
+    Like get_block_timestamps, but returns an empty map if the batched lookup fails.
+
+    Callers then fall back to per-block get_block requests via get_block_timestamp.
+
+    Args:
+        w3 (Web3): Web3 instance backed by an HTTP provider.
+        block_numbers (Iterable[int]): Block numbers to look up (duplicates are ignored).
+        rate_limiter (Optional[RateLimiter]): Request pacing for this provider.
+
+    Returns:
+        Dict[int, int]: Mapping of block number to UNIX timestamp; empty on failure.
+    """
+    try:
+        return get_block_timestamps(w3, block_numbers, rate_limiter)
+    except Exception as e:
+        logger.warning(f"Batched block lookup failed, falling back to per-log requests: {e}")
+        return {}
+
+
+@lru_cache(maxsize=4096)
+def format_block_timestamp(block_timestamp: int) -> str:
+    """
+    Format a block timestamp as an ISO-8601 UTC string (memoized; logs share blocks).
+
+    Args:
+        block_timestamp (int): Block UNIX timestamp.
+
+    Returns:
+        str: ISO-8601 UTC timestamp without offset, e.g. '2024-07-01T00:00:00'.
+    """
+    return datetime.utcfromtimestamp(block_timestamp).isoformat()
+
+
+def get_block_timestamp(w3: Web3, block_number: int, block_timestamps: Optional[Dict[int, int]] = None) -> int:
+    """
+    Look up a block timestamp in a prefetched map, fetching it on a miss.
+
+    Fetched timestamps are stored back into `block_timestamps`, so logs that
+    share a block cost one get_block call even when the batched prefetch failed.
+
+    Args:
+        w3 (Web3): Web3 provider.
+        block_number (int): Block number.
+        block_timestamps (Optional[Dict[int, int]]): Per-chunk timestamp map (updated in place).
+
+    Returns:
+        int: Block UNIX timestamp.
+    """
+    if block_timestamps is not None and block_number in block_timestamps:
+        return block_timestamps[block_number]
+    timestamp = w3.eth.get_block(block_number)['timestamp']
+    if block_timestamps is not None:
+        block_timestamps[block_number] = timestamp
+    return timestamp
+
+
+def get_transactions(
+    w3: Web3, tx_hashes: Iterable[str], rate_limiter: Optional[RateLimiter] = None
+) -> Dict[str, dict]:
+    """
+    Fetch many transactions using batched eth_getTransactionByHash calls.
+
+    Args:
+        w3 (Web3): Web3 instance backed by an HTTP provider.
+        tx_hashes (Iterable[str]): 0x-prefixed transaction hashes (duplicates are ignored).
+        rate_limiter (Optional[RateLimiter]): Request pacing for this provider.
+
+    Returns:
+        Dict[str, dict]: Mapping of tx hash to raw JSON-RPC transaction; failed lookups are omitted.
+    """
+    hashes = sorted(set(tx_hashes))
+    txs = rpc_batch(w3, [('eth_getTransactionByHash', [h]) for h in hashes], rate_limiter=rate_limiter)
+    return {h: tx for h, tx in zip(hashes, txs) if tx}
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    Check whether an RPC error is an HTTP 429 / rate-limit response.
+
+    Args:
+        error (Exception): Error raised by a web3 call.
+
+    Returns:
+        bool: True if the provider asked us to slow down.
+    """
+    message = str(error).lower()
+    return _RATE_LIMIT_STATUS.search(message) is not None or 'too many requests' in message
+
+
+def is_log_limit_error(error: Exception) -> bool:
+    """
+    Check whether an eth_getLogs error means the requested range was too large.
+
+    Args:
+        error (Exception): Error raised by get_logs.
+
+    Returns:
+        bool: True if splitting the block range may succeed.
+    """
+    message = str(error).lower()
+    return any(fragment in message for fragment in LOG_LIMIT_ERRORS)
+
+
+def get_logs_split(w3: Web3, filter_params: dict, rate_limiter: Optional[RateLimiter] = None) -> Tuple[List[Any], bool]:
+    """
+    Fetch logs, recursively halving the block range when the provider rejects it as too large.
+
+    Args:
+        w3 (Web3): Web3 provider.
+        filter_params (dict): eth_getLogs filter with integer fromBlock/toBlock.
+        rate_limiter (Optional[RateLimiter]): Paces every eth_getLogs request, including split halves.
+
+    Returns:
+        Tuple[List[Any], bool]: Logs in block order, and whether the range had to be split.
+    """
+    from_block, to_block = filter_params['fromBlock'], filter_params['toBlock']
+    try:
+        if rate_limiter:
+            rate_limiter.acquire()
+        return list(w3.eth.get_logs(filter_params)), False
+    except Exception as e:
+        if to_block <= from_block or not is_log_limit_error(e):
+            raise
+        logger.debug(f"Log range {from_block}-{to_block} rejected ({e}); splitting")
+    mid = (from_block + to_block) // 2
+    left, _ = get_logs_split(w3, {**filter_params, 'toBlock': mid}, rate_limiter)
+    right, _ = get_logs_split(w3, {**filter_params, 'fromBlock': mid + 1}, rate_limiter)
+    return left + right, True
+
+
+def next_log_range(chunk_size: int, split: bool, streak: int) -> Tuple[int, int]:
+    """
+    Apply the eth_getLogs range policy shared by every scanner after one request.
+
+    The range is halved when the provider rejected it, and grows 1.5x (by at least one block,
+    so a range of 1 can recover) after LOG_RANGE_GROWTH_STREAK successes, up to MAX_LOG_RANGE.
+
+    Args:
+        chunk_size (int): Current number of blocks per request.
+        split (bool): Whether the last range was rejected as too large.
+        streak (int): Consecutive successful requests, including the last one.
+
+    Returns:
+        Tuple[int, int]: New chunk size and success streak.
+    """
+    if split:
+        return max(chunk_size // 2, 1), 0
+    if streak >= LOG_RANGE_GROWTH_STREAK:
+        return min(max(chunk_size + 1, int(chunk_size * 1.5)), MAX_LOG_RANGE), 0
+    return chunk_size, streak
+
+
+def iter_log_chunks(
+    w3: Web3,
+    filter_params: dict,
+    from_block: int,
+    to_block: int,
+    chunk_size: int,
+    rate_limiter: Optional[RateLimiter] = None
+) -> Iterator[Tuple[int, int, List[Any]]]:
+    """
+    Walk [from_block, to_block] with eth_getLogs, adapting the chunk size to provider limits.
+
+    Rate-limited chunks are retried (up to RATE_LIMIT_RETRIES attempts) after the rate limiter backs off.
+
+    Args:
+        w3 (Web3): Web3 provider.
+        filter_params (dict): eth_getLogs filter without fromBlock/toBlock.
+        from_block (int): First block to scan.
+        to_block (int): Last block to scan (inclusive).
+        chunk_size (int): Initial number of blocks per request.
+        rate_limiter (Optional[RateLimiter]): Request pacing for this provider (a default one is created if omitted).
+
+    Returns:
+        Iterator[Tuple[int, int, List[Any]]]: (chunk start, chunk end, logs); logs are empty for chunks that failed.
+    """
+    rate_limiter = rate_limiter or RateLimiter()
+    block_start = from_block
+    streak = 0
+    while block_start <= to_block:
+        block_end = min(block_start + chunk_size - 1, to_block)
+        for attempt in range(RATE_LIMIT_RETRIES):
+            try:
+                logs, split = get_logs_split(w3, {**filter_params, 'fromBlock': block_start, 'toBlock': block_end}, rate_limiter)
+            except Exception as e:
+                if is_rate_limit_error(e) and attempt < RATE_LIMIT_RETRIES - 1:
+                    rate_limiter.on_rate_limited(rate_limit_backoff(attempt))
+                    logger.warning(f"Rate limited fetching logs {block_start}-{block_end}; retrying in {rate_limit_backoff(attempt):g}s")
+                    continue
+                logger.error(f"Error fetching logs {block_start}-{block_end}: {e}")
+                logs, split, streak = [], False, 0
+            else:
+                rate_limiter.on_success()
+                streak += 1
+            break
+        chunk_size, streak = next_log_range(chunk_size, split, streak)
+        yield block_start, block_end, logs
+        block_start = block_end + 1
@@ -1,12 +1,20 @@
 import sqlite3
-from typing import Optional, Dict
+from decimal import Context, Decimal
+from typing import Optional, Dict, Tuple
 from web3 import Web3
 import threading
 import os
 
+from shared.rpc import get_http_provider
+
 _DB_PATH = os.path.expanduser('~/.token_cache.sqlite')
 _WEB3 = None
 _DB_LOCK = threading.Lock()
+# Decimal arithmetic on raw token amounts: uint256 values have up to 78 digits (and sums a few more),
+# while the default context keeps only 28 significant digits and rounds the rest away
+AMOUNT_CONTEXT = Context(prec=100)
+# (symbol, name, decimals) by checksum address, memoized in-process; price is mutable and always read from the DB
+_METADATA_CACHE: Dict[str, Tuple[str, str, int]] = {}
 
 # --- DB Schema ---
 _SCHEMA = '''
@@ -24,7 +32,7 @@ CREATE TABLE IF NOT EXISTS tokens (
 def init_web3(rpc_url: str) -> None:
     """Initialize Web3 connection for fallback lookups."""
     global _WEB3
-    _WEB3 = Web3(Web3.HTTPProvider(rpc_url))
+    _WEB3 = Web3(get_http_provider(rpc_url))
 
 # --- DB Connection ---
 def _get_conn() -> sqlite3.Connection:
@@ -42,6 +50,7 @@ def get_token_info(address: str) -> Optional[Dict]:
         row = cur.fetchone()
         if row:
             symbol, name, decimals, price = row
+            _METADATA_CACHE[address] = (symbol, name, decimals)
             return {'address': address, 'symbol': symbol, 'name': name, 'decimals': decimals, 'price': price}
         # Fallback to Web3
         if not _WEB3:
@@ -52,24 +61,40 @@ def get_token_info(address: str) -> Optional[Dict]:
                 {"constant":True,"inputs":[],"name":"name","outputs":[{"name":"","type":"string"}],"type":"function"},
                 {"constant":True,"inputs":[],"name":"decimals","outputs":[{"name":"","type":"uint8"}],"type":"function"}
             ])
-            symbol = contract.functions.symbol().call()
-            name = contract.functions.name().call()
-            decimals = contract.functions.decimals().call()
+            # One batched HTTP request for all three metadata calls
+            with _WEB3.batch_requests() as batch:
+                batch.add(contract.functions.symbol())
+                batch.add(contract.functions.name())
+                batch.add(contract.functions.decimals())
+                symbol, name, decimals = batch.execute()
             price = None
             # Insert into cache
             conn.execute('INSERT OR REPLACE INTO tokens (address, symbol, name, decimals, price, updated_at) VALUES (?, ?, ?, ?, ?, strftime("%s","now"))',
                          (address, symbol, name, decimals, price))
             conn.commit()
+            _METADATA_CACHE[address] = (symbol, name, decimals)
             return {'address': address, 'symbol': symbol, 'name': name, 'decimals': decimals, 'price': price}
         except Exception as e:
             return None
         finally:
             conn.close()
 
+def get_token_metadata(address: str) -> Optional[Dict]:
+    """Get token symbol, name and decimals, memoized in-process (they never change for a deployed token)."""
+    address = Web3.to_checksum_address(address)
+    metadata = _METADATA_CACHE.get(address)
+    if metadata is None:
+        if not get_token_info(address):
+            return None
+        metadata = _METADATA_CACHE[address]
+    symbol, name, decimals = metadata
+    return {'address': address, 'symbol': symbol, 'name': name, 'decimals': decimals}
+
 def format_token_amount(amount: int, address: str) -> str:
     """Format a raw token amount using cached decimals."""
-    info = get_token_info(address)
+    info = get_token_metadata(address)
     if not info or info['decimals'] is None:
         return str(amount)
     decimals = info['decimals']
-    return f"{amount / (10 ** decimals):,.6f} {info['symbol'] or ''}" 
\ No newline at end of file
+    # Decimal keeps 18-decimal wei amounts exact; float division rounds large values
+    return f"{Decimal(int(amount)).scaleb(-decimals, AMOUNT_CONTEXT):,.6f} {info['symbol'] or ''}" 
\ No newline at end of file
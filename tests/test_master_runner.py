@@ -0,0 +1,241 @@
+import importlib
+import os
+import sqlite3
+import sys
+import types
+from decimal import Decimal
+import pytest
+
+# master_runner imports every protocol listener by bare module name at import time
+LISTENER_MODULES = {
+    'relay_listener': None,
+    'portals_listener': 'PortalsListener',
+    'chainflip_listener': 'ChainflipBrokerListener',
+    'thorchain_listener': 'THORChainListener',
+    'cowswap_listener': 'CowSwapListener',
+    'zerox_listener': 'ZeroXListener',
+}
+
+@pytest.fixture
+def master_runner(monkeypatch):
+    for name, listener_class in LISTENER_MODULES.items():
+        module = types.ModuleType(name)
+        if listener_class:
+            setattr(module, listener_class, object)
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.delitem(sys.modules, 'listeners.master_runner', raising=False)
+    return importlib.import_module('listeners.master_runner')
+
+@pytest.fixture
+def runner(master_runner, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('databases')
+    runner = master_runner.MasterRunner.__new__(master_runner.MasterRunner)
+    runner.comprehensive_db_path = 'databases/comprehensive_affiliate.db'
+    runner.init_comprehensive_database()
+    return runner
+
+def seed_table(db_path, table, rows):
+    columns = list(rows[0])
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, {', '.join(columns)})")
+        conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [tuple(row[col] for col in columns) for row in rows]
+        )
+    conn.close()
+
+def test_consolidate_does_not_change_source_journal_mode(runner):
+    seed_table('databases/relay_transactions.db', 'relay_transactions', [
+        {'tx_hash': '0xaa', 'block_number': 1, 'timestamp': 1700000000, 'from_address': '0xa', 'volume_usd': 5.0},
+    ])
+    runner.consolidate_databases()
+    conn = sqlite3.connect('databases/relay_transactions.db')
+    journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    conn.close()
+    assert journal_mode == 'delete'
+    conn = sqlite3.connect(runner.comprehensive_db_path)
+    rows = conn.execute('SELECT protocol, tx_hash, volume_usd FROM comprehensive_transactions').fetchall()
+    conn.close()
+    assert rows == [('Relay', '0xaa', 5.0)]
+
+def test_since_filter_applies_to_text_and_integer_timestamps(runner):
+    seed_table('databases/relay_transactions.db', 'relay_transactions', [
+        {'tx_hash': '0xold', 'block_number': 1, 'timestamp': '2020-01-01T00:00:00'},
+        {'tx_hash': '0xnew', 'block_number': 2, 'timestamp': '2024-07-01T00:00:00'},
+    ])
+    seed_table('databases/zerox_transactions.db', 'zerox_transactions', [
+        {'chain': 'base', 'tx_hash': '0xold', 'block_number': 1, 'block_timestamp': 1600000000},
+        {'chain': 'base', 'tx_hash': '0xnew', 'block_number': 2, 'block_timestamp': 1719792000},
+    ])
+    runner.consolidate_databases()
+    conn = sqlite3.connect(runner.comprehensive_db_path)
+    types_seen = {row[0] for row in conn.execute('SELECT typeof(timestamp) FROM comprehensive_transactions')}
+    conn.close()
+    assert types_seen == {'integer'}
+    stats = runner.get_comprehensive_stats(1700000000)
+    assert stats['by_protocol'] == {'Relay': 1, '0x Protocol': 1}
+
+def test_init_repairs_previously_consolidated_text_timestamps(runner):
+    conn = sqlite3.connect(runner.comprehensive_db_path)
+    conn.execute("INSERT INTO comprehensive_transactions (protocol, chain, tx_hash, timestamp) VALUES ('Relay', 'arbitrum', '0xa', '2020-01-01T00:00:00')")
+    conn.commit()
+    conn.close()
+    runner.init_comprehensive_database()
+    assert runner.get_comprehensive_stats(1700000000)['total_transactions'] == 0
+    assert runner.get_comprehensive_stats()['total_transactions'] == 1
+
+def test_since_is_parsed_by_argparse(master_runner, monkeypatch, capsys):
+    assert master_runner.parse_since('2024-07-01') == 1719792000
+    monkeypatch.setattr(sys, 'argv', ['master_runner.py', '--stats-only', '--since', '2024-13-01'])
+    with pytest.raises(SystemExit) as excinfo:
+        master_runner.main()
+    assert excinfo.value.code == 2
+    assert "invalid date '2024-13-01'" in capsys.readouterr().err
+
+def test_safe_timestamp_parses_epochs_and_iso_strings(runner):
+    assert runner.safe_timestamp(1719792000) == 1719792000
+    assert runner.safe_timestamp('1719792000') == 1719792000
+    assert runner.safe_timestamp('2024-07-01T00:00:00') == 1719792000
+    assert runner.safe_timestamp('2024-07-01T02:00:00+02:00') == 1719792000
+    assert runner.safe_timestamp(None) == 0
+    assert runner.safe_timestamp('not a date') == 0
+
+def test_fee_totals_are_summed_exactly_and_scaled_by_decimals(runner, master_runner, monkeypatch):
+    monkeypatch.setattr(master_runner, 'format_token_amount', lambda amount, address: f"{amount / 10**18:.6f} FOX")
+    seed_table('databases/zerox_transactions.db', 'zerox_transactions', [
+        {'chain': 'base', 'tx_hash': '0x1', 'block_timestamp': 1, 'affiliate_fee_asset': '0xfox', 'affiliate_fee_amount': '1000000000000000000001'},
+        {'chain': 'base', 'tx_hash': '0x2', 'block_timestamp': 1, 'affiliate_fee_asset': '0xfox', 'affiliate_fee_amount': '1000000000000000000001'},
+        {'chain': 'base', 'tx_hash': '0x3', 'block_timestamp': 1, 'affiliate_fee_asset': '0xfox', 'affiliate_fee_amount': None},
+    ])
+    runner.consolidate_databases()
+    stats = runner.get_comprehensive_stats()
+    assert stats['fees_by_asset'] == [('0x Protocol', '0xfox', Decimal(2000000000000000000002), 0.0)]
+    assert runner.format_fee_amount(Decimal(2 * 10**18), '0xfox') == '2.000000 FOX'
+
+def test_fee_totals_keep_every_digit_past_28(runner, master_runner, monkeypatch):
+    monkeypatch.setattr(master_runner, 'format_token_amount', lambda amount, address: str(amount))
+    seed_table('databases/zerox_transactions.db', 'zerox_transactions', [
+        {'chain': 'base', 'tx_hash': '0x1', 'block_timestamp': 1, 'affiliate_fee_asset': '0xfox', 'affiliate_fee_amount': str(10**28)},
+        {'chain': 'base', 'tx_hash': '0x2', 'block_timestamp': 1, 'affiliate_fee_asset': '0xfox', 'affiliate_fee_amount': '1'},
+        {'chain': 'base', 'tx_hash': '0x3', 'block_timestamp': 1, 'affiliate_fee_asset': '0xbar', 'affiliate_fee_amount': str(10**28) + '.5'},
+    ])
+    runner.consolidate_databases()
+    fees = {asset: amount for _, asset, amount, _ in runner.get_comprehensive_stats()['fees_by_asset']}
+    assert fees == {'0xfox': Decimal(10**28 + 1), '0xbar': Decimal(str(10**28) + '.5')}
+    assert runner.format_fee_amount(fees['0xfox'], '0xfox') == str(10**28 + 1)
+    assert runner.safe_amount(str(10**28) + '.50') == str(10**28) + '.5'
+
+def test_format_fee_amount_keeps_raw_units_for_non_token_assets(runner):
+    assert runner.format_fee_amount(Decimal('1234567'), 'BTC.BTC') == '1,234,567'
+
+def test_init_migrates_real_fee_amounts_to_text(runner):
+    conn = sqlite3.connect(runner.comprehensive_db_path)
+    conn.execute('DROP TABLE comprehensive_transactions')
+    conn.execute('''
+        CREATE TABLE comprehensive_transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, protocol TEXT NOT NULL, chain TEXT NOT NULL, tx_hash TEXT NOT NULL,
+            block_number INTEGER, timestamp INTEGER NOT NULL, from_asset TEXT, to_asset TEXT, from_amount REAL,
+            to_amount REAL, from_amount_usd REAL, to_amount_usd REAL, volume_usd REAL, affiliate_fee_amount REAL,
+            affiliate_fee_usd REAL, affiliate_fee_asset TEXT, affiliate_address TEXT, sender_address TEXT,
+            recipient_address TEXT, event_type TEXT, raw_data TEXT, created_at INTEGER, UNIQUE(protocol, tx_hash, chain)
+        )
+    ''')
+    conn.executemany(
+        "INSERT INTO comprehensive_transactions (protocol, chain, tx_hash, timestamp, affiliate_fee_amount) VALUES ('0x Protocol', 'base', ?, 1, ?)",
+        [('0x1', 1e21), ('0x2', 0.5)]
+    )
+    conn.commit()
+    conn.close()
+    runner.init_comprehensive_database()
+    conn = sqlite3.connect(runner.comprehensive_db_path)
+    amounts = conn.execute('SELECT affiliate_fee_amount, typeof(affiliate_fee_amount) FROM comprehensive_transactions ORDER BY tx_hash').fetchall()
+    indexes = {row[1] for row in conn.execute('PRAGMA index_list(comprehensive_transactions)')}
+    conn.close()
+    assert amounts == [('1000000000000000000000', 'text'), ('0.5', 'text')]
+    assert 'idx_timestamp' in indexes
+
+def test_init_drops_unused_fee_asset_index(runner):
+    conn = sqlite3.connect(runner.comprehensive_db_path)
+    conn.execute('CREATE INDEX idx_protocol_fee_asset ON comprehensive_transactions(protocol, affiliate_fee_asset)')
+    conn.commit()
+    conn.close()
+    runner.init_comprehensive_database()
+    conn = sqlite3.connect(runner.comprehensive_db_path)
+    indexes = {row[1] for row in conn.execute('PRAGMA index_list(comprehensive_transactions)')}
+    conn.close()
+    assert 'idx_protocol_fee_asset' not in indexes
+
+def make_row(values):
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    columns = list(values)
+    row = conn.execute(f"SELECT {', '.join('? AS ' + col for col in columns)}", [values[col] for col in columns]).fetchone()
+    conn.close()
+    return columns, row
+
+def test_build_row_mapper_resolves_fallback_columns_and_coerces(runner, master_runner):
+    columns, row = make_row({
+        'transaction_hash': '0xabc', 'input_token': '0xin', 'output_amount': 'not a number',
+        'input_amount': '12.5', 'partner': '0xpartner', 'from_address': '0xsender', 'block_timestamp': '2024-07-01T00:00:00',
+    })
+    mapped = dict(zip(master_runner.COMPREHENSIVE_COLUMNS, runner.build_row_mapper(columns, 'Portals')(row)))
+    assert mapped['protocol'] == 'Portals'
+    assert mapped['chain'] == 'unknown'
+    assert mapped['tx_hash'] == '0xabc'
+    assert mapped['from_asset'] == '0xin'
+    assert mapped['from_amount'] == 12.5
+    assert mapped['to_amount'] == 0.0
+    assert mapped['affiliate_address'] == '0xpartner'
+    assert mapped['sender_address'] == '0xsender'
+    assert mapped['timestamp'] == 1719792000
+    assert mapped['affiliate_fee_amount'] == '0'
+    assert mapped['event_type'] == 'transaction'
+    assert "'transaction_hash': '0xabc'" in mapped['raw_data']
+
+def test_build_row_mapper_prefers_first_candidate_column(runner, master_runner):
+    columns, row = make_row({'tx_hash': '0xprimary', 'transaction_hash': '0xfallback', 'sender': '0xa', 'from_address': '0xb'})
+    mapped = dict(zip(master_runner.COMPREHENSIVE_COLUMNS, runner.build_row_mapper(columns, 'Relay')(row)))
+    assert mapped['tx_hash'] == '0xprimary'
+    assert mapped['sender_address'] == '0xa'
+
+def test_comprehensive_stats_group_by_protocol_and_chain(runner):
+    seed_table('databases/zerox_transactions.db', 'zerox_transactions', [
+        {'chain': 'base', 'tx_hash': '0x1', 'block_timestamp': 1, 'volume_usd': 100.0, 'affiliate_fee_usd': 1.5},
+        {'chain': 'arbitrum', 'tx_hash': '0x2', 'block_timestamp': 1, 'volume_usd': 50.0, 'affiliate_fee_usd': 0.5},
+    ])
+    seed_table('databases/portals_transactions.db', 'portals_transactions', [
+        {'chain': 'base', 'tx_hash': '0x3', 'block_timestamp': 1},
+    ])
+    runner.consolidate_databases()
+    stats = runner.get_comprehensive_stats()
+    assert stats['total_transactions'] == 3
+    assert stats['by_protocol'] == {'0x Protocol': 2, 'Portals': 1}
+    assert stats['by_chain'] == {'base': 2, 'arbitrum': 1}
+    assert stats['total_fees_usd'] == 2.0
+    assert stats['total_volume_usd'] == 150.0
+
+def test_run_all_listeners_records_each_protocol_result(runner, master_runner, monkeypatch):
+    calls = []
+    class Listener:
+        def __init__(self, name, fail=False):
+            self.name, self.fail = name, fail
+        def run_listener(self, arg):
+            calls.append((self.name, arg))
+            if self.fail:
+                raise RuntimeError('rpc down')
+    relay = master_runner.relay_listener
+    monkeypatch.setattr(relay, 'init_database', lambda: None, raising=False)
+    monkeypatch.setattr(relay, 'find_last_20_shapeshift_transactions', lambda: ['tx'], raising=False)
+    monkeypatch.setattr(relay, 'save_transactions_to_db', lambda txs: calls.append(('relay', txs)), raising=False)
+    runner.listeners = {'zerox': Listener('zerox'), 'thorchain': Listener('thorchain', fail=True)}
+    results = runner.run_all_listeners(blocks_to_scan=500, limit=7)
+    assert sorted(calls) == [('relay', ['tx']), ('thorchain', 7), ('zerox', 500)]
+    assert results['relay']['status'] == 'success'
+    assert results['zerox']['status'] == 'success'
+    assert results['thorchain'] == {'status': 'error', 'time': results['thorchain']['time'], 'error': 'rpc down'}
+
+def test_safe_float_falls_back_to_zero(runner):
+    assert runner.safe_float('1.25') == 1.25
+    assert runner.safe_float(None) == 0.0
+    assert runner.safe_float('abc') == 0.0
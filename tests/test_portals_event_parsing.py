@@ -1,5 +1,9 @@
+import os
+import sqlite3
+import sys
 import pytest
-from listeners.portals_listener import parse_erc20_transfer_event, parse_portals_event
+import listeners.portals_listener as portals_listener
+from listeners.portals_listener import parse_erc20_transfer_event, parse_portals_event, process_log_entry, get_block_range
 
 class MockEth:
     def get_transaction(self, tx_hash):
@@ -47,4 +51,270 @@ def test_parse_portals_event(mock_w3):
     assert event['chain'] == 'ethereum'
     assert event['sender'].lower() == '0xaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa'
     assert event['broadcaster'].lower() == '0xbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb'
-    assert event['partner'].lower() == '0xcccccccccccccccccccccccccccccccccccccccc' 
\ No newline at end of file
+    assert event['partner'].lower() == '0xcccccccccccccccccccccccccccccccccccccccc' 
+
+def test_parse_erc20_transfer_event_uses_prefetched_context():
+    class NoRpcEth:
+        def get_transaction(self, tx_hash):
+            raise AssertionError('unexpected get_transaction')
+        def get_block(self, block_number):
+            raise AssertionError('unexpected get_block')
+    class W3:
+        eth = NoRpcEth()
+    log = {
+        'topics': [
+            bytes.fromhex('ddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'),
+            bytes.fromhex('000000000000000000000000aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa'),
+            bytes.fromhex('000000000000000000000000bbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb')
+        ],
+        'transactionHash': bytes.fromhex('c0ffee' * 5),
+        'blockNumber': 123,
+        'address': '0xTokenAddress',
+        'data': bytes.fromhex('00000000000000000000000000000000000000000000000000000000000003e8')
+    }
+    router = '0x1234567890abcdef1234567890abcdef12345678'
+    event = parse_erc20_transfer_event(
+        log, 'ethereum', '0xbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb', [router], W3(),
+        block_timestamps={123: 1700000000},
+        transactions={'0x' + 'c0ffee' * 5: {'to': router}}
+    )
+    assert event['block_timestamp'] == 1700000000
+    assert event['is_portals_router'] is True
+
+
+def test_process_log_entry_dispatches_on_topic_bytes(mock_w3):
+    log = {
+        'topics': [bytes.fromhex('ddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'), bytes(32), bytes(32)],
+        'transactionHash': bytes.fromhex('c0ffee' * 5),
+        'blockNumber': 123,
+        'address': '0xTokenAddress',
+        'data': bytes(32)
+    }
+    event = process_log_entry(log, 'ethereum', '0x' + '00' * 20, [], mock_w3)
+    assert event['event_type'] == 'ERC20_TRANSFER'
+    log['topics'][0] = bytes(32)
+    assert process_log_entry(log, 'ethereum', '0x' + '00' * 20, [], mock_w3) is None
+
+
+def test_get_block_range_resumes_from_saved_progress():
+    class W3:
+        class eth:
+            block_number = 500
+    chain_cfg = {'name': 'Ethereum', 'start_block': 100}
+    assert get_block_range(W3(), 'ethereum', chain_cfg, {'ethereum': 321}, False) == (321, 500)
+    assert get_block_range(W3(), 'ethereum', chain_cfg, {}, False) == (100, 500)
+
+
+def test_parse_portals_event_decodes_raw_data_bytes(mock_w3):
+    words = [
+        bytes(12) + bytes.fromhex('11' * 20),
+        (5000).to_bytes(32, 'big'),
+        bytes(12) + bytes.fromhex('22' * 20),
+        (4900).to_bytes(32, 'big'),
+        bytes(12) + bytes.fromhex('33' * 20),
+    ]
+    log = {
+        'topics': [bytes(32), bytes(32), bytes(32), bytes(32)],
+        'transactionHash': bytes.fromhex('c0ffee' * 5),
+        'blockNumber': 123,
+        'data': b''.join(words)
+    }
+    event = parse_portals_event(log, 'ethereum', mock_w3)
+    assert event['input_token'] == '0x' + '11' * 20
+    assert event['input_amount'] == '5000'
+    assert event['output_token'] == '0x' + '22' * 20
+    assert event['output_amount'] == '4900'
+    assert event['recipient'] == '0x' + '33' * 20
+
+
+def test_prefetch_log_context_only_fetches_dao_transfer_transactions(monkeypatch):
+    requested = []
+    monkeypatch.setattr(portals_listener, 'get_block_timestamps', lambda w3, numbers, rate_limiter: {n: 1 for n in numbers})
+    monkeypatch.setattr(portals_listener, 'get_transactions', lambda w3, hashes, rate_limiter: requested.extend(hashes) or {})
+    dao = '0x' + 'bb' * 20
+    def make_log(topic0, recipient, tx_byte):
+        return {
+            'topics': [topic0, bytes(32), bytes(12) + bytes.fromhex(recipient * 20)],
+            'transactionHash': bytes([tx_byte]) * 32,
+            'blockNumber': 1
+        }
+    logs = [
+        make_log(portals_listener.ERC20_TRANSFER_TOPIC_BYTES, 'bb', 1),
+        make_log(portals_listener.ERC20_TRANSFER_TOPIC_BYTES, 'cc', 2),
+        make_log(portals_listener.PORTALS_EVENT_TOPIC_BYTES, 'bb', 3),
+    ]
+    block_timestamps, _ = portals_listener.prefetch_log_context(None, logs, 'ethereum', dao)
+    assert block_timestamps == {1: 1}
+    assert requested == ['0x' + '01' * 32]
+
+
+def test_save_events_to_db_batches_both_event_types(monkeypatch, tmp_path):
+    db_path = str(tmp_path / 'portals.db')
+    monkeypatch.setattr(portals_listener, 'DB_PATH', db_path)
+    with portals_listener.connect_db(db_path) as conn:
+        conn.execute(f"CREATE TABLE portals_transactions (id INTEGER PRIMARY KEY, {', '.join(portals_listener.EVENT_COLUMNS)})")
+    base = {'chain': 'ethereum', 'tx_hash': 'ab', 'block_number': 1, 'block_timestamp': 2, 'sender': '0xa', 'recipient': '0xb'}
+    portals_listener.save_events_to_db([
+        dict(base, event_type='ERC20_TRANSFER', token='0xt', amount='10', is_portals_router=True,
+             input_token=None, input_amount=None, output_token=None, output_amount=None, broadcaster=None, partner=None),
+        dict(base, event_type='portals_event', input_token='0xi', input_amount='5', output_token='0xo',
+             output_amount='4', broadcaster='0xc', partner='0xd'),
+    ])
+    with portals_listener.connect_db(db_path) as conn:
+        rows = conn.execute('SELECT event_type, amount, input_amount, is_portals_router FROM portals_transactions ORDER BY id').fetchall()
+    assert rows == [('ERC20_TRANSFER', '10', None, 1), ('portals_event', None, '5', None)]
+
+
+def test_save_progress_replaces_file_atomically(monkeypatch, tmp_path):
+    progress_path = str(tmp_path / 'progress.json')
+    monkeypatch.setattr(portals_listener, 'PROGRESS_PATH', progress_path)
+    portals_listener.save_progress({'ethereum': 100})
+    portals_listener.save_progress({'ethereum': 200, 'base': 5})
+    assert portals_listener.load_progress() == {'ethereum': 200, 'base': 5}
+    assert os.listdir(tmp_path) == ['progress.json']
+
+
+def test_parse_erc20_transfer_event_does_not_cache_tx_targets(mock_w3):
+    log = {
+        'topics': [portals_listener.ERC20_TRANSFER_TOPIC_BYTES, bytes(32), bytes(12) + bytes.fromhex('bb' * 20)],
+        'transactionHash': bytes.fromhex('c0ffee' * 5),
+        'blockNumber': 123,
+        'address': '0xTokenAddress',
+        'data': bytes(32)
+    }
+    router = '0x1234567890abcdef1234567890abcdef12345678'
+    portals_listener.address_bytes.cache_clear()
+    event = parse_erc20_transfer_event(
+        log, 'ethereum', '0x' + 'bb' * 20, [], mock_w3,
+        router_addresses=portals_listener.router_address_set([portals_listener.to_checksum_address(router)])
+    )
+    assert event['is_portals_router'] is True
+    # Only the router and DAO (config addresses) are memoized, not the transaction's target
+    assert portals_listener.address_bytes.cache_info().currsize == 2
+
+
+def test_fetch_logs_with_retry_fails_over_on_first_429(monkeypatch):
+    monkeypatch.setattr(portals_listener.time, 'sleep', lambda seconds: pytest.fail('unexpected sleep'))
+    calls = []
+    class Provider:
+        endpoint_uri = 'https://mainnet.infura.io/v3/key'
+    class Eth:
+        def get_logs(self, params):
+            calls.append(params)
+            raise ValueError('429 Client Error: Too Many Requests')
+    class W3:
+        provider = Provider()
+        eth = Eth()
+    class Fallback:
+        class provider:
+            endpoint_uri = 'https://eth-mainnet.g.alchemy.com/v2/key'
+    fallback = Fallback()
+    limiter = portals_listener.RateLimiter(rate=8)
+    result, w3 = portals_listener.fetch_logs_with_retry(W3(), {}, 'ethereum', 0, 9, fallback_w3=fallback, rate_limiter=limiter)
+    assert (result, w3) == ('SWITCH_TO_ALCHEMY', fallback)
+    assert len(calls) == 1
+    assert limiter.rate == 4
+
+
+def test_main_today_with_interval_only_rescans_from_midnight_once(monkeypatch):
+    passes = []
+    monkeypatch.setattr(sys, 'argv', ['portals_listener.py', '--today', '--interval', '60'])
+    monkeypatch.setattr(portals_listener, 'load_config', lambda path: {'chains': {'base': {}}, 'dao_addresses': {}})
+    monkeypatch.setattr(portals_listener, 'connect_db', lambda path: None)
+    monkeypatch.setattr(portals_listener, 'ensure_schema', lambda conn, sql: None)
+    monkeypatch.setattr(portals_listener, 'init_database', lambda: None)
+    monkeypatch.setattr(portals_listener, 'load_progress', lambda: {})
+    monkeypatch.setattr(portals_listener, 'scan_all_chains', lambda *args, today_mode, alchemy_urls: passes.append(today_mode) or {})
+    class StopLoop(Exception):
+        pass
+    def sleep(seconds):
+        if len(passes) == 3:
+            raise StopLoop
+    monkeypatch.setattr(portals_listener.time, 'sleep', sleep)
+    with pytest.raises(StopLoop):
+        portals_listener.main()
+    assert passes == [True, False, False]
+
+
+def stub_scan(monkeypatch, fetch_logs, latest_block=19):
+    """Point scan_chain at a fake provider, returning the list save_progress records snapshots into."""
+    saved = []
+    class Eth:
+        block_number = latest_block
+    class W3:
+        eth = Eth()
+        def is_connected(self):
+            return True
+    monkeypatch.setattr(portals_listener, 'get_web3_providers', lambda *args: (W3(), None))
+    monkeypatch.setattr(portals_listener, 'fetch_logs_with_retry', fetch_logs)
+    monkeypatch.setattr(portals_listener, 'prefetch_log_context', lambda *args: ({}, {}))
+    monkeypatch.setattr(portals_listener, 'process_log_entry', lambda log, *args: {'tx_hash': log})
+    monkeypatch.setattr(portals_listener, 'save_progress', lambda progress: saved.append(dict(progress)))
+    return saved
+
+
+def test_scan_chain_does_not_save_progress_past_a_failed_insert(monkeypatch):
+    saved = stub_scan(monkeypatch, lambda w3, params, *args, **kwargs: (['0x%d' % params['fromBlock']], w3))
+    def save_events_to_db(events):
+        if events[0]['tx_hash'] == '0x10':
+            raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(portals_listener, 'save_events_to_db', save_events_to_db)
+    progress = {}
+    with pytest.raises(sqlite3.OperationalError):
+        portals_listener.scan_chain('base', {'start_block': 0, 'batch_size': 10}, '0x' + '11' * 20, [], progress)
+    assert saved == [{'base': 10}]
+    assert progress == {'base': 10}
+
+
+def test_scan_all_chains_omits_failed_chains(monkeypatch):
+    def scan_chain(chain_name, chain_cfg, dao_address, portals_contracts, progress, batch_size, today_mode, alchemy_urls):
+        if chain_name == 'base':
+            raise RuntimeError('rpc down')
+        return chain_cfg['found']
+    monkeypatch.setattr(portals_listener, 'scan_chain', scan_chain)
+    chains = {'ethereum': {'found': 3}, 'base': {'found': 1}, 'arbitrum': {'found': 0}}
+    assert portals_listener.scan_all_chains(chains, {}, [], {}, 10) == {'ethereum': 3, 'arbitrum': 0}
+    assert portals_listener.scan_all_chains({}, {}, [], {}, 10) == {}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+    def monotonic(self):
+        return self.now
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_fetch_logs_with_retry_backs_off_then_raises(monkeypatch):
+    import shared.rpc as rpc
+    clock = FakeClock()
+    monkeypatch.setattr(rpc, 'time', clock)
+    calls = []
+    class Eth:
+        def get_logs(self, params):
+            calls.append(params)
+            raise ValueError('429 Client Error: Too Many Requests')
+    class W3:
+        provider = None
+        eth = Eth()
+    with pytest.raises(ValueError):
+        portals_listener.fetch_logs_with_retry(W3(), {}, 'base', 0, 9, rate_limiter=portals_listener.RateLimiter(rate=8))
+    assert len(calls) == portals_listener.RATE_LIMIT_RETRIES
+    # At least the old 1+2+4+8+16s of backoff before giving up
+    assert clock.now >= 31
+
+
+def test_scan_chain_stops_without_saving_progress_when_rate_limited(monkeypatch):
+    def fetch_logs(w3, params, *args, **kwargs):
+        if params['fromBlock'] == 10:
+            raise ValueError('429 Client Error: Too Many Requests')
+        return ['0x%d' % params['fromBlock']], w3
+    saved = stub_scan(monkeypatch, fetch_logs, latest_block=29)
+    monkeypatch.setattr(portals_listener, 'save_events_to_db', lambda events: None)
+    progress = {}
+    found = portals_listener.scan_chain('base', {'start_block': 0, 'batch_size': 10}, '0x' + '11' * 20, [], progress)
+    assert found == 1
+    assert saved == [{'base': 10}]
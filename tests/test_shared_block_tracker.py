@@ -0,0 +1,32 @@
+import shared.block_tracker as block_tracker
+from shared.block_tracker import find_block_by_timestamp
+
+class MockEth:
+    def __init__(self):
+        self.calls = 0
+    def get_block(self, block_number):
+        self.calls += 1
+        return {'timestamp': 1000 + block_number * 12}
+
+class MockW3:
+    def __init__(self):
+        self.eth = MockEth()
+
+def test_find_block_by_timestamp_binary_searches():
+    w3 = MockW3()
+    # Block 500 is at 7000; 7001 falls between 500 and 501
+    assert find_block_by_timestamp(w3, 7001, 0, 1_000_000) == 501
+    assert find_block_by_timestamp(w3, 7000, 0, 1_000_000) == 500
+    assert w3.eth.calls <= 2 * 21
+
+def test_find_block_by_timestamp_past_head_returns_end():
+    assert find_block_by_timestamp(MockW3(), 10**12, 0, 100) == 100
+
+def test_set_last_processed_block_upserts(tmp_path, monkeypatch):
+    monkeypatch.setattr(block_tracker, '_DB_PATH', str(tmp_path / 'tracker.sqlite'))
+    block_tracker.init_database()
+    block_tracker.set_last_processed_block('relay', 'base', 100)
+    block_tracker.set_last_processed_block('relay', 'base', 250)
+    assert block_tracker.get_last_processed_block('relay') == 250
+    assert block_tracker.get_start_block('relay', 'base') == 251
+    assert list(block_tracker.get_all_listeners_status()) == ['relay']
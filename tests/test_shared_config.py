@@ -17,4 +17,16 @@ def test_load_yaml_config_env_substitution(monkeypatch):
         config = load_yaml_config(f.name)
     assert config['foo'] == 'bar'
     assert config['env'] == 'env_value'
-    assert config['nested']['key'] == 'env_value' 
\ No newline at end of file
+    assert config['nested']['key'] == 'env_value' 
+
+def test_load_yaml_config_reuses_parse_until_file_changes(monkeypatch, tmp_path):
+    config_path = tmp_path / 'config.yaml'
+    config_path.write_text('chains:\n  - ${TEST_CHAIN}\n')
+    monkeypatch.setenv('TEST_CHAIN', 'ethereum')
+    first = load_yaml_config(str(config_path))
+    first['chains'].append('mutated')
+    monkeypatch.setenv('TEST_CHAIN', 'base')
+    assert load_yaml_config(str(config_path)) == {'chains': ['base']}
+    config_path.write_text('chains: []\n')
+    os.utime(config_path, ns=(0, 10**18))
+    assert load_yaml_config(str(config_path)) == {'chains': []}
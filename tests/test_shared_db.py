@@ -1,11 +1,10 @@
 import os
-import tempfile
 import sqlite3
+import pytest
 from shared.db import db_connection, init_table
 
-def test_db_connection_and_init_table():
-    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
-        db_path = f.name
+def test_db_connection_and_init_table(tmp_path):
+    db_path = str(tmp_path / 'test.db')
     schema_sql = '''
         CREATE TABLE IF NOT EXISTS test_table (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -18,5 +17,34 @@ def test_db_connection_and_init_table():
         cursor.execute('INSERT INTO test_table (value) VALUES (?)', ('foo',))
         cursor.execute('SELECT value FROM test_table WHERE id=1')
         result = cursor.fetchone()
-    os.remove(db_path)
-    assert result[0] == 'foo' 
\ No newline at end of file
+    assert result[0] == 'foo'
+
+def test_connect_db_enables_wal(tmp_path):
+    from shared.db import connect_db
+    conn = connect_db(str(tmp_path / 'test.db'))
+    journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    conn.close()
+    assert journal_mode == 'wal'
+
+def test_ensure_db_dir_creates_each_directory_once(monkeypatch, tmp_path):
+    import shared.db as db
+    calls = []
+    real_makedirs = os.makedirs
+    monkeypatch.setattr(db.os, 'makedirs', lambda path, exist_ok=False: calls.append(path) or real_makedirs(path, exist_ok=exist_ok))
+    db_path = str(tmp_path / 'nested' / 'test.db')
+    db.ensure_db_dir(db_path)
+    db.ensure_db_dir(db_path)
+    db.ensure_db_dir('relative.db')
+    assert calls == [str(tmp_path / 'nested')]
+    assert os.path.isdir(tmp_path / 'nested')
+
+def test_insert_rows_skips_duplicates_and_raises_after_rollback(tmp_path):
+    from shared.db import insert_rows
+    db_path = str(tmp_path / 'test.db')
+    init_table(db_path, 'CREATE TABLE events (tx_hash TEXT UNIQUE, amount TEXT)')
+    assert insert_rows(db_path, 'events', ('tx_hash', 'amount'), [('0xa', '1'), ('0xb', '2'), ('0xa', '3')]) == 2
+    with pytest.raises(sqlite3.Error):
+        insert_rows(db_path, 'events', ('tx_hash', 'amount'), [('0xc', '4'), ('0xd', '5', 'extra')])
+    with db_connection(db_path) as conn:
+        rows = conn.execute('SELECT tx_hash, amount FROM events ORDER BY tx_hash').fetchall()
+    assert rows == [('0xa', '1'), ('0xb', '2')]
@@ -0,0 +1,221 @@
+import json
+import pytest
+import shared.rpc as rpc
+from shared.rpc import rpc_batch, get_block_timestamps
+
+class MockProvider:
+    endpoint_uri = 'http://localhost:8545'
+
+class MockW3:
+    provider = MockProvider()
+
+class MockResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+        self.content = json.dumps(payload).encode()
+    def raise_for_status(self):
+        pass
+    def json(self):
+        return self._payload
+
+@pytest.fixture
+def posted(monkeypatch):
+    sent = []
+    def fake_post(url, data=None, headers=None, timeout=None):
+        batch = json.loads(data)
+        sent.append(batch)
+        # Answer out of order, erroring on block 0x2
+        return MockResponse([
+            {'jsonrpc': '2.0', 'id': req['id'], 'error': {'code': -32000, 'message': 'boom'}}
+            if req['params'][0] == '0x2' else
+            {'jsonrpc': '2.0', 'id': req['id'], 'result': {'timestamp': hex(1000 + int(req['params'][0], 16))}}
+            for req in reversed(batch)
+        ])
+    monkeypatch.setattr(rpc.get_session(), 'post', fake_post)
+    return sent
+
+def test_rpc_batch_chunks_and_orders_results(posted):
+    calls = [('eth_getBlockByNumber', [hex(n), False]) for n in (1, 3, 4)]
+    results = rpc_batch(MockW3(), calls, batch_size=2)
+    assert len(posted) == 2
+    assert [r['timestamp'] for r in results] == ['0x3e9', '0x3eb', '0x3ec']
+
+def test_get_block_timestamps_dedupes_and_skips_errors(posted):
+    timestamps = get_block_timestamps(MockW3(), [1, 2, 1, 3])
+    assert timestamps == {1: 1001, 3: 1003}
+    assert len(posted[0]) == 3
+
+def test_rpc_batch_surfaces_provider_error_when_batching_is_rejected(monkeypatch):
+    error = {'code': -32600, 'message': 'batch requests are not supported'}
+    monkeypatch.setattr(rpc.get_session(), 'post', lambda *args, **kwargs: MockResponse({'jsonrpc': '2.0', 'id': None, 'error': error}))
+    with pytest.raises(RuntimeError, match='batch requests are not supported'):
+        rpc_batch(MockW3(), [('eth_getBlockByNumber', ['0x1', False])])
+
+def test_session_retries_gateway_errors_but_not_rate_limits():
+    adapter = rpc.get_session().get_adapter('https://example.invalid')
+    retry = adapter.max_retries
+    assert retry.total == rpc.RETRY_TOTAL
+    assert 503 in retry.status_forcelist
+    assert 429 not in retry.status_forcelist
+    assert 'POST' in retry.allowed_methods
+
+def test_rate_limited_get_logs_fails_after_one_request():
+    import threading
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from web3 import Web3
+    requests_seen = []
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers['Content-Length']))
+            requests_seen.append(self.path)
+            self.send_response(429)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        def log_message(self, *args):
+            pass
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        w3 = Web3(rpc.get_http_provider(f'http://127.0.0.1:{server.server_port}'))
+        with pytest.raises(Exception) as excinfo:
+            w3.eth.get_logs({'fromBlock': 0, 'toBlock': 1})
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert rpc.is_rate_limit_error(excinfo.value)
+    assert len(requests_seen) == 1
+
+def test_is_rate_limit_error_ignores_429_inside_numbers():
+    assert rpc.is_rate_limit_error(ValueError('429 Client Error: Too Many Requests'))
+    assert not rpc.is_rate_limit_error(ValueError('header not found for block 14290000'))
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+    def monotonic(self):
+        return self.now
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def test_rate_limiter_paces_and_adapts(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rpc, 'time', clock)
+    limiter = rpc.RateLimiter(rate=2, capacity=1)
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.sleeps == [0.5]
+    limiter.on_rate_limited()
+    assert limiter.rate == 1
+    limiter.on_success()
+    assert limiter.rate == 1 + rpc.RATE_INCREASE_STEP
+    # A 429 drains the bucket, so the next request waits instead of bursting
+    clock.now += 10
+    limiter.on_rate_limited()
+    limiter.acquire()
+    assert clock.sleeps[-1] == 1 / limiter.rate
+    # A backoff holds the next request back for at least that long
+    limiter.on_rate_limited(backoff=4)
+    limiter.acquire()
+    assert clock.sleeps[-1] >= 4
+
+class LimitedEth:
+    """get_logs that rejects ranges wider than max_range blocks, returning one log per block otherwise."""
+    def __init__(self, max_range):
+        self.max_range = max_range
+        self.calls = []
+    def get_logs(self, params):
+        self.calls.append((params['fromBlock'], params['toBlock']))
+        if params['toBlock'] - params['fromBlock'] + 1 > self.max_range:
+            raise ValueError({'code': -32005, 'message': 'query returned more than 10000 results'})
+        return list(range(params['fromBlock'], params['toBlock'] + 1))
+
+class LimitedW3:
+    def __init__(self, max_range):
+        self.eth = LimitedEth(max_range)
+
+def test_get_logs_split_halves_rejected_ranges():
+    w3 = LimitedW3(max_range=25)
+    logs, split = rpc.get_logs_split(w3, {'fromBlock': 0, 'toBlock': 99})
+    assert split
+    assert logs == list(range(100))
+
+def test_get_logs_split_reraises_other_errors():
+    class W3:
+        class eth:
+            @staticmethod
+            def get_logs(params):
+                raise ValueError('connection reset')
+    with pytest.raises(ValueError):
+        rpc.get_logs_split(W3(), {'fromBlock': 0, 'toBlock': 99})
+
+def test_iter_log_chunks_adapts_chunk_size(monkeypatch):
+    monkeypatch.setattr(rpc, 'time', FakeClock())
+    w3 = LimitedW3(max_range=50)
+    chunks = list(rpc.iter_log_chunks(w3, {}, 0, 999, 100))
+    assert [log for _, _, chunk in chunks for log in chunk] == list(range(1000))
+    sizes = [end - start + 1 for start, end, _ in chunks]
+    # 100 is split and halved to 50, then grows to 75 after a streak of successes
+    assert sizes[:2] == [100, 50]
+    assert 75 in sizes
+
+def test_get_block_timestamp_caches_fallback_fetches():
+    calls = []
+    class W3:
+        class eth:
+            @staticmethod
+            def get_block(block_number):
+                calls.append(block_number)
+                return {'timestamp': 1000 + block_number}
+    cache = {5: 42}
+    assert rpc.get_block_timestamp(W3(), 5, cache) == 42
+    assert rpc.get_block_timestamp(W3(), 7, cache) == 1007
+    assert rpc.get_block_timestamp(W3(), 7, cache) == 1007
+    assert calls == [7]
+
+def test_try_get_block_timestamps_returns_empty_on_failure(monkeypatch):
+    def fail(w3, calls):
+        raise ValueError('batch rejected')
+    monkeypatch.setattr(rpc, 'rpc_batch', fail)
+    assert rpc.try_get_block_timestamps(MockW3(), [1, 2]) == {}
+
+def test_format_block_timestamp_is_iso_utc():
+    assert rpc.format_block_timestamp(1719792000) == '2024-07-01T00:00:00'
+
+def test_iter_log_chunks_retries_rate_limited_chunks(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rpc, 'time', clock)
+    w3 = LimitedW3(max_range=100)
+    real_get_logs = w3.eth.get_logs
+    failures = [ValueError('429 Client Error: Too Many Requests')]
+    def get_logs(params):
+        if failures:
+            raise failures.pop()
+        return real_get_logs(params)
+    w3.eth.get_logs = get_logs
+    limiter = rpc.RateLimiter(rate=8)
+    chunks = list(rpc.iter_log_chunks(w3, {}, 0, 9, 10, rate_limiter=limiter))
+    assert chunks == [(0, 9, list(range(10)))]
+    assert limiter.rate == 4 + rpc.RATE_INCREASE_STEP
+
+def test_next_log_range_grows_from_one_block():
+    chunk_size, streak = 1, 0
+    for _ in range(3 * rpc.LOG_RANGE_GROWTH_STREAK):
+        chunk_size, streak = rpc.next_log_range(chunk_size, False, streak + 1)
+    assert chunk_size == 4
+    assert rpc.next_log_range(rpc.MAX_LOG_RANGE, False, rpc.LOG_RANGE_GROWTH_STREAK) == (rpc.MAX_LOG_RANGE, 0)
+    assert rpc.next_log_range(1, True, 3) == (1, 0)
+
+def test_rpc_batch_backs_off_429s_through_the_rate_limiter(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rpc, 'time', clock)
+    responses = [MockResponse(None, 429), MockResponse(None, 429), MockResponse([{'jsonrpc': '2.0', 'id': 0, 'result': '0x1'}])]
+    monkeypatch.setattr(rpc.get_session(), 'post', lambda *args, **kwargs: responses.pop(0))
+    limiter = rpc.RateLimiter(rate=8)
+    assert rpc_batch(MockW3(), [('eth_blockNumber', [])], rate_limiter=limiter) == ['0x1']
+    assert not responses
+    assert clock.now >= rpc.rate_limit_backoff(0) + rpc.rate_limit_backoff(1)
+    assert limiter.rate == 2 + rpc.RATE_INCREASE_STEP
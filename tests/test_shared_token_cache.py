@@ -0,0 +1,36 @@
+import shared.token_cache as token_cache
+from shared.token_cache import format_token_amount
+
+def test_format_token_amount_is_exact_for_large_wei_amounts(monkeypatch):
+    monkeypatch.setattr(token_cache, 'get_token_metadata', lambda address: {'symbol': 'FOX', 'decimals': 18})
+    # float division renders this as 123,456,789,012,345.671875
+    assert format_token_amount(123456789012345678901234567890123, '0x0') == '123,456,789,012,345.678901 FOX'
+    assert format_token_amount(1, '0x0') == '0.000000 FOX'
+    # Past the default 28-digit Decimal context
+    assert format_token_amount(10**40 + 10**12, '0x0') == '10,000,000,000,000,000,000,000.000001 FOX'
+
+def test_format_token_amount_without_decimals(monkeypatch):
+    monkeypatch.setattr(token_cache, 'get_token_metadata', lambda address: None)
+    assert format_token_amount(1000, '0x0') == '1000'
+
+def test_get_token_metadata_memoizes_cached_rows_but_not_price(monkeypatch, tmp_path):
+    monkeypatch.setattr(token_cache, '_DB_PATH', str(tmp_path / 'tokens.sqlite'))
+    monkeypatch.setattr(token_cache, '_METADATA_CACHE', {})
+    address = '0xc770EEfAd204B5180dF6a14Ee197D99d808ee52d'
+    conn = token_cache._get_conn()
+    conn.execute('INSERT INTO tokens (address, symbol, name, decimals, price) VALUES (?, ?, ?, ?, ?)', (address, 'FOX', 'FOX', 18, 0.1))
+    conn.commit()
+    assert token_cache.get_token_info(address)['price'] == 0.1
+    # A re-bootstrapped price is picked up; only symbol/name/decimals are memoized
+    conn.execute('UPDATE tokens SET price = 0.2')
+    conn.commit()
+    conn.close()
+    assert token_cache.get_token_info(address)['price'] == 0.2
+    info = token_cache.get_token_metadata(address.lower())
+    assert info == {'address': address, 'symbol': 'FOX', 'name': 'FOX', 'decimals': 18}
+    # Callers get copies, so mutating one does not poison the cache
+    info['decimals'] = 0
+    def fail():
+        raise AssertionError('unexpected DB access')
+    monkeypatch.setattr(token_cache, '_get_conn', fail)
+    assert token_cache.get_token_metadata(address)['decimals'] == 18
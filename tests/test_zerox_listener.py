@@ -0,0 +1,14 @@
+import logging
+import listeners.zerox_listener as zerox_listener
+
+def test_scan_all_chains_omits_failed_chains(monkeypatch):
+    def scan_chain(chain_name, chain_cfg, logger):
+        if chain_name == 'base':
+            raise RuntimeError('rpc down')
+        return chain_cfg['found']
+    monkeypatch.setattr(zerox_listener, 'scan_chain', scan_chain)
+    chains = {'ethereum': {'found': 3}, 'base': {'found': 1}, 'arbitrum': {'found': 0}}
+    assert zerox_listener.scan_all_chains(chains, logging.getLogger('test')) == {'ethereum': 3, 'arbitrum': 0}
+
+def test_scan_all_chains_with_no_chains_configured():
+    assert zerox_listener.scan_all_chains({}, logging.getLogger('test')) == {}